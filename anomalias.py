@@ -0,0 +1,209 @@
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+
+from imputacion import imputar_estacion, posiciones_rachas, rachas, rejilla_horaria
+
+# Constante que hace la MAD comparable a la desviación típica en datos normales
+_K_MAD = 0.6745
+
+
+def residuos_descomposicion(df, columna="PM2.5", periodo=24, columna_estacion="code"):
+    """
+    Residuos de la descomposición aditiva de cada estación, en formato ancho (tiempo × estación).
+
+    El periodo de seasonal_decompose cuenta posiciones, así que cada serie se lleva antes a la rejilla horaria y los
+    huecos se rellenan con imputacion.imputar_estacion (lineal los cortos, perfil estacional los largos); con dropna
+    cada hueco desplazaría la fase estacional y crearía residuos espurios. Las horas rellenadas se devuelven como NaN
+    para que no se marquen como anomalías.
+
+    Parámetros
+
+    df: Data frame largo indexado por fecha con la columna de estación.
+    columna: str, Variable a descomponer.
+    periodo: int, Periodo estacional de seasonal_decompose.
+    columna_estacion: str, Columna con el código de la estación.
+
+    Devuelve
+
+    Data frame horario con una columna de residuos por estación (NaN en las horas sin dato).
+    """
+    residuos = {}
+    for codigo, grupo in df.groupby(columna_estacion):
+        rejilla = rejilla_horaria(grupo, [columna])
+        serie = rejilla[columna]
+        rellena = imputar_estacion(rejilla, max_largo=len(rejilla), periodo=periodo)[0][columna]
+        # Solo pueden quedar NaN en los extremos (sin datos con los que estimar el perfil), que no rompen la rejilla
+        rellena = rellena.loc[rellena.first_valid_index():rellena.last_valid_index()]
+        resid = sm.tsa.seasonal_decompose(rellena, model="additive", period=periodo).resid
+        residuos[codigo] = resid.where(serie.reindex(resid.index).notna())
+    return pd.DataFrame(residuos)
+
+
+def z_robusto(residuos):
+    """
+    Puntuación z robusta de cada residuo frente a la mediana y la MAD de su estación, para todas a la vez.
+
+    Parámetros
+
+    residuos: Data frame ancho (tiempo × estación).
+
+    Devuelve
+
+    Data frame con la misma forma.
+    """
+    valores = residuos.to_numpy(dtype=float)
+    mediana = np.nanmedian(valores, axis=0)
+    mad = np.nanmedian(np.abs(valores - mediana), axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = _K_MAD * (valores - mediana) / mad
+    return pd.DataFrame(z, index=residuos.index, columns=residuos.columns)
+
+
+def agrupar_episodios(marcas, residuos, z=None, hueco_max=0):
+    """
+    Agrupa las marcas contiguas de cada estación en episodios con inicio, fin y pico.
+
+    Parámetros
+
+    marcas: Data frame booleano (tiempo × estación).
+    residuos: Data frame con los residuos de la misma forma.
+    z: Data frame con la puntuación z (opcional, para informar del z del pico).
+    hueco_max: int, Huecos de hasta estas horas sin marca dentro de un episodio se consideran parte de él.
+
+    Devuelve
+
+    Data frame con estacion, inicio, fin, duracion, pico, residuo_pico y z_pico (solo si se pasa z), con las mismas
+    columnas aunque no haya episodios.
+    """
+    m = marcas.to_numpy(dtype=bool).copy()
+    if hueco_max > 0:
+        # Se rellenan los huecos cortos entre dos tramos marcados
+        col, ini, fin = rachas(~m)
+        cortos = (fin - ini <= hueco_max) & (ini > 0) & (fin < len(m))
+        for c, a, b in zip(col[cortos], ini[cortos], fin[cortos]):
+            m[a:b, c] = True
+
+    col, ini, fin = rachas(m)
+    if len(col) == 0:
+        columnas = ["estacion", "inicio", "fin", "duracion", "pico", "residuo_pico"]
+        return pd.DataFrame(columns=columnas + (["z_pico"] if z is not None else []))
+
+    r = residuos.to_numpy(dtype=float)
+    # Todas las posiciones de todos los episodios de una vez y el máximo |residuo| de cada uno con lexsort
+    ids, filas = posiciones_rachas(ini, fin)
+    magnitud = np.nan_to_num(np.abs(r[filas, col[ids]]), nan=-np.inf)
+    orden = np.lexsort((-magnitud, ids))
+    _, primero = np.unique(ids[orden], return_index=True)
+    pos_pico = filas[orden][primero]
+
+    indice = marcas.index
+    episodios = pd.DataFrame({
+        "estacion": marcas.columns[col],
+        "inicio": indice[ini],
+        "fin": indice[fin - 1],
+        "duracion": fin - ini,
+        "pico": indice[pos_pico],
+        "residuo_pico": r[pos_pico, col],
+    })
+    if z is not None:
+        episodios["z_pico"] = z.to_numpy(dtype=float)[pos_pico, col]
+    return episodios.sort_values(["inicio", "estacion"], ignore_index=True)
+
+
+def detectar_episodios(residuos, umbral=3.5, hueco_max=0):
+    """
+    Marca anomalías con z robusto (mediana/MAD) en todas las estaciones y devuelve la tabla de episodios.
+
+    Parámetros
+
+    residuos: Data frame ancho (tiempo × estación), p. ej. de residuos_descomposicion.
+    umbral: float, |z| a partir del cual un residuo es anómalo (3.5 es el valor habitual con MAD).
+    hueco_max: int, Ver agrupar_episodios.
+
+    Devuelve
+
+    Data frame de episodios (ver agrupar_episodios).
+    """
+    z = z_robusto(residuos)
+    return agrupar_episodios(z.abs() > umbral, residuos, z, hueco_max)
+
+
+class DetectorEpisodios:
+    """
+    Versión incremental de detectar_episodios para residuos que llegan hora a hora.
+
+    La mediana y la MAD se calculan sobre un buffer circular con los últimos 'ventana' residuos de cada estación
+    (todas las estaciones a la vez), y cada estación mantiene su episodio abierto hasta que deja de estar marcada.
+
+    Parámetros
+
+    estaciones: list, Códigos de estación (columnas de los residuos).
+    ventana: int, Residuos recientes que forman la referencia robusta.
+    umbral: float, |z| a partir del cual un residuo es anómalo.
+    min_obs: int, Residuos mínimos en el buffer antes de empezar a marcar.
+    """
+
+    def __init__(self, estaciones, ventana=24 * 30, umbral=3.5, min_obs=48):
+        self.estaciones = list(estaciones)
+        self.umbral = umbral
+        self.min_obs = min_obs
+        self.buffer = np.full((ventana, len(self.estaciones)), np.nan)
+        self.ptr = 0
+        self.abiertos = {}
+
+    def actualizar(self, residuos):
+        """
+        Procesa nuevas filas de residuos y devuelve los episodios que se han cerrado con ellas.
+
+        Parámetros
+
+        residuos: Data frame (tiempo × estación) o Serie (estación) con nombre igual al instante.
+
+        Devuelve
+
+        Data frame de episodios cerrados (mismas columnas que agrupar_episodios).
+        """
+        if isinstance(residuos, pd.Series):
+            residuos = residuos.to_frame().T
+        valores = residuos.reindex(columns=self.estaciones).to_numpy(dtype=float)
+
+        cerrados = []
+        for instante, r in zip(residuos.index, valores):
+            n_obs = np.sum(~np.isnan(self.buffer), axis=0)
+            with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+                # Las estaciones sin historia todavía dan medianas NaN, que no marcan nada
+                warnings.simplefilter("ignore", RuntimeWarning)
+                mediana = np.nanmedian(self.buffer, axis=0)
+                mad = np.nanmedian(np.abs(self.buffer - mediana), axis=0)
+                z = _K_MAD * (r - mediana) / mad
+            marcado = (np.abs(z) > self.umbral) & (n_obs >= self.min_obs)
+
+            for j, estacion in enumerate(self.estaciones):
+                ep = self.abiertos.get(estacion)
+                if marcado[j]:
+                    if ep is None:
+                        self.abiertos[estacion] = {"estacion": estacion, "inicio": instante, "fin": instante,
+                                                   "duracion": 1, "pico": instante, "residuo_pico": r[j],
+                                                   "z_pico": z[j]}
+                    else:
+                        ep["fin"], ep["duracion"] = instante, ep["duracion"] + 1
+                        if abs(r[j]) > abs(ep["residuo_pico"]):
+                            ep["pico"], ep["residuo_pico"], ep["z_pico"] = instante, r[j], z[j]
+                elif ep is not None:
+                    cerrados.append(self.abiertos.pop(estacion))
+
+            self.buffer[self.ptr] = r
+            self.ptr = (self.ptr + 1) % len(self.buffer)
+
+        return pd.DataFrame(cerrados, columns=["estacion", "inicio", "fin", "duracion", "pico", "residuo_pico",
+                                               "z_pico"])
+
+    def episodios_abiertos(self):
+        """
+        Episodios todavía en curso (útiles para alertar antes de que terminen).
+        """
+        return pd.DataFrame(list(self.abiertos.values()))
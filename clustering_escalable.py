@@ -0,0 +1,214 @@
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+from scipy.special import logsumexp
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+from utilidades import trozos
+
+
+class _ClusteringPorTrozos(ABC):
+    # Parte común: selección de columnas, descarte de NaN y escalado incremental. Cada modelo define actualizar y
+    # _reexpresar (cómo pasar su estado a las coordenadas del escalado nuevo)
+
+    def __init__(self, columnas, escalar):
+        self.columnas = list(columnas)
+        self.escalador = StandardScaler() if escalar else None
+
+    def _matriz(self, trozo):
+        if isinstance(trozo, pd.DataFrame):
+            trozo = trozo[self.columnas].to_numpy(dtype=float)
+        X = np.asarray(trozo, dtype=float).reshape(len(trozo), -1)
+        return X[~np.isnan(X).any(axis=1)]
+
+    def _escalar(self, X, ajustar=False):
+        if self.escalador is None:
+            return X
+        if ajustar:
+            anterior = (self.escalador.mean_, self.escalador.scale_) if hasattr(self.escalador, "mean_") else None
+            self.escalador.partial_fit(X)
+            if anterior is not None:
+                # El escalado cambia con cada trozo: lo aprendido en las coordenadas anteriores se pasa a las nuevas
+                # (x_nuevo = a·x_anterior + b) para que centros, trozos nuevos y etiquetar usen el mismo sistema
+                a = anterior[1] / self.escalador.scale_
+                self._reexpresar(a, (anterior[0] - self.escalador.mean_) / self.escalador.scale_)
+        return self.escalador.transform(X)
+
+    @abstractmethod
+    def actualizar(self, trozo):
+        pass
+
+    @abstractmethod
+    def _reexpresar(self, a, b):
+        pass
+
+    def ajustar(self, datos, tam_trozo=50000):
+        """
+        Ajusta el modelo recorriendo los datos por trozos (una sola pasada).
+        """
+        for trozo in trozos(datos, tam_trozo):
+            self.actualizar(trozo)
+        return self
+
+    def etiquetar(self, trozo):
+        """
+        Asigna cluster a nuevas observaciones sin reajustar el modelo. Las filas con NaN reciben -1.
+
+        Parámetros
+
+        trozo: Data frame con las columnas del modelo o array (n, variables).
+
+        Devuelve
+
+        np.ndarray de etiquetas con la misma longitud que el trozo.
+        """
+        if isinstance(trozo, pd.DataFrame):
+            trozo = trozo[self.columnas].to_numpy(dtype=float)
+        X = np.asarray(trozo, dtype=float).reshape(len(trozo), -1)
+        validas = ~np.isnan(X).any(axis=1)
+        etiquetas = np.full(len(X), -1)
+        if validas.any():
+            etiquetas[validas] = self._predecir(self._escalar(X[validas]))
+        return etiquetas
+
+
+class KMeansIncremental(_ClusteringPorTrozos):
+    """
+    K-Means por mini-lotes que se actualiza trozo a trozo (partial_fit), pensado para toda la red y todos los años.
+
+    Parámetros
+
+    n_clusters: int, Número de clusters.
+    columnas: list, Columnas usadas cuando se pasan Data frames (por defecto ['PM2.5']).
+    escalar: bool, Estandariza con media y desviación acumuladas.
+    random_state: int, Semilla.
+    """
+
+    def __init__(self, n_clusters=6, columnas=("PM2.5",), escalar=True, random_state=42):
+        super().__init__(columnas, escalar)
+        self.modelo = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, n_init=3)
+
+    def actualizar(self, trozo):
+        """
+        Incorpora un trozo de datos nuevo al modelo.
+        """
+        X = self._matriz(trozo)
+        if len(X) >= self.modelo.n_clusters:
+            self.modelo.partial_fit(self._escalar(X, ajustar=True))
+        return self
+
+    def _reexpresar(self, a, b):
+        if hasattr(self.modelo, "cluster_centers_"):
+            self.modelo.cluster_centers_ = self.modelo.cluster_centers_ * a + b
+
+    def _predecir(self, X):
+        return self.modelo.predict(X)
+
+    @property
+    def centros(self):
+        centros = self.modelo.cluster_centers_
+        return centros if self.escalador is None else self.escalador.inverse_transform(centros)
+
+
+class GMMIncremental(_ClusteringPorTrozos):
+    """
+    Mezcla de gaussianas (covarianza diagonal) ajustada con EM online: cada trozo actualiza estadísticos suficientes.
+
+    Se usa el EM por pasos: los estadísticos acumulados se mezclan con los del trozo con un peso (t + 2)^(-kappa),
+    de modo que el modelo olvida poco a poco los trozos antiguos y se adapta a datos nuevos sin reajustar desde cero.
+
+    Parámetros
+
+    n_components: int, Número de componentes.
+    columnas: list, Columnas usadas cuando se pasan Data frames (por defecto ['PM2.5']).
+    escalar: bool, Estandariza con media y desviación acumuladas (no hace falta: la GMM diagonal no depende de la escala).
+    kappa: float, Exponente del paso (entre 0.5 y 1; más alto olvida más despacio).
+    reg_covar: float, Varianza mínima añadida para estabilidad numérica.
+    n_iter_inicial: int, Iteraciones de EM completo sobre el primer trozo para inicializar.
+    random_state: int, Semilla de la inicialización.
+    """
+
+    def __init__(self, n_components=6, columnas=("PM2.5",), escalar=False, kappa=0.6, reg_covar=1e-6,
+                 n_iter_inicial=100, random_state=42):
+        super().__init__(columnas, escalar)
+        self.n_components = n_components
+        self.kappa = kappa
+        self.reg_covar = reg_covar
+        self.n_iter_inicial = n_iter_inicial
+        self.rng = np.random.default_rng(random_state)
+        self.n_trozos = 0
+        self.pesos = self.medias = self.varianzas = None
+
+    def _inicializar(self, X):
+        # Medias en cuantiles repartidos del primer trozo (ordenado por la primera variable)
+        orden = np.argsort(X[:, 0])
+        pos = ((np.arange(self.n_components) + 0.5) / self.n_components * len(X)).astype(int)
+        self.medias = X[orden[pos]] + 1e-3 * self.rng.standard_normal((self.n_components, X.shape[1]))
+        self.varianzas = np.tile(X.var(axis=0) + self.reg_covar, (self.n_components, 1))
+        self.pesos = np.full(self.n_components, 1 / self.n_components)
+
+        # EM completo sobre el primer trozo; después solo se hacen pasos online
+        for _ in range(self.n_iter_inicial):
+            self._paso_m(*self._estadisticos(X))
+        self._s0, self._s1, self._s2 = self._estadisticos(X)
+
+    def _estadisticos(self, X):
+        resp = np.exp(self._log_resp(X))
+        return resp.mean(axis=0), resp.T @ X / len(X), resp.T @ (X ** 2) / len(X)
+
+    def _paso_m(self, s0, s1, s2):
+        self.pesos = s0 / s0.sum()
+        self.medias = s1 / s0[:, None]
+        self.varianzas = np.maximum(s2 / s0[:, None] - self.medias ** 2, 0) + self.reg_covar
+
+    def _log_resp(self, X):
+        log_dens = -0.5 * (np.log(2 * np.pi * self.varianzas).sum(axis=1)
+                           + (((X[:, None, :] - self.medias) ** 2) / self.varianzas).sum(axis=2))
+        log_conj = log_dens + np.log(self.pesos)
+        return log_conj - logsumexp(log_conj, axis=1, keepdims=True)
+
+    def actualizar(self, trozo):
+        """
+        Incorpora un trozo de datos nuevo (un paso E sobre el trozo y un paso M sobre los estadísticos acumulados).
+        """
+        X = self._matriz(trozo)
+        if len(X) < self.n_components:
+            return self
+        X = self._escalar(X, ajustar=True)
+        if self.medias is None:
+            self._inicializar(X)
+            self.n_trozos += 1
+            return self
+
+        s0, s1, s2 = self._estadisticos(X)
+        eta = (self.n_trozos + 2) ** -self.kappa
+        self._s0 = (1 - eta) * self._s0 + eta * s0
+        self._s1 = (1 - eta) * self._s1 + eta * s1
+        self._s2 = (1 - eta) * self._s2 + eta * s2
+        self.n_trozos += 1
+        self._paso_m(self._s0, self._s1, self._s2)
+        return self
+
+    def _reexpresar(self, a, b):
+        if self.medias is None:
+            return
+        # Transformación afín exacta de los estadísticos suficientes: E[x'] = a·E[x] + b, E[x'²] = a²E[x²] + 2ab·E[x] + b²
+        self._s2 = a ** 2 * self._s2 + 2 * a * b * self._s1 + b ** 2 * self._s0[:, None]
+        self._s1 = a * self._s1 + b * self._s0[:, None]
+        self._paso_m(self._s0, self._s1, self._s2)
+
+    def _predecir(self, X):
+        return self._log_resp(X).argmax(axis=1)
+
+    def probabilidades(self, trozo):
+        """
+        Probabilidad de pertenencia a cada componente (equivalente a predict_proba). Las filas con NaN se descartan.
+        """
+        return np.exp(self._log_resp(self._escalar(self._matriz(trozo))))
+
+    @property
+    def centros(self):
+        return self.medias if self.escalador is None else self.escalador.inverse_transform(self.medias)
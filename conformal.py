@@ -0,0 +1,144 @@
+
+import numpy as np
+import pandas as pd
+
+
+class ConformalRodante:
+    """
+    Intervalos de predicción conformes (split/rolling) para cualquier modelo: RF, XGBoost, LSTM, VAR o SARIMA.
+
+    Para cada estación y horizonte se guardan los últimos 'ventana' residuos de calibración ordenados en un buffer
+    (S, H, ventana), junto con su orden de llegada en un buffer circular. Cada actualización borra el residuo más
+    antiguo e inserta el nuevo en su posición de todas las estaciones y horizontes a la vez, y los intervalos salen
+    de un único take_along_axis sobre los buffers ordenados, sin ordenar nada al predecir.
+
+    Con k = ⌈(n + 1)(1 - alpha)⌉ el k-ésimo residuo absoluto da cobertura ≥ 1 - alpha si los residuos son
+    intercambiables; con pocos residuos (k > n) el intervalo es infinito.
+
+    Parámetros
+
+    estaciones: list, Códigos de estación (primer eje).
+    horizontes: int, Número de horizontes de pronóstico (segundo eje, h = 1..horizontes).
+    ventana: int, Residuos de calibración que se conservan por estación y horizonte.
+    alpha: float, 1 - cobertura nominal.
+    simetrico: bool, Si True se usa |y - ŷ| (intervalo simétrico); si False los residuos con signo y los cuantiles
+    alpha/2 y 1 - alpha/2 (intervalo asimétrico, útil con PM2.5 sesgada a la derecha).
+    """
+
+    def __init__(self, estaciones, horizontes=1, ventana=500, alpha=0.1, simetrico=True):
+        self.estaciones = list(estaciones)
+        self.horizontes = horizontes
+        self.ventana = ventana
+        self.alpha = alpha
+        self.simetrico = simetrico
+        forma = (len(self.estaciones), horizontes)
+        self.ordenados = np.full(forma + (ventana,), np.inf)
+        self.llegada = np.full(forma + (ventana,), np.nan)
+        self.ptr = np.zeros(forma, dtype=int)
+        self.n = np.zeros(forma, dtype=int)
+        self._posiciones = np.arange(ventana)
+
+    def _a_array(self, datos):
+        if isinstance(datos, pd.DataFrame):
+            datos = datos.reindex(self.estaciones)
+        return np.asarray(datos, dtype=float).reshape(len(self.estaciones), self.horizontes)
+
+    def actualizar(self, y_real, y_pred):
+        """
+        Incorpora los residuos de un instante (cuando se conocen los valores reales de los pronósticos emitidos).
+
+        Parámetros
+
+        y_real, y_pred: array-like o Data frame (estaciones, horizontes); los NaN no actualizan su celda.
+        """
+        r = self._a_array(y_real) - self._a_array(y_pred)
+        if self.simetrico:
+            r = np.abs(r)
+        activos = ~np.isnan(r)
+        idx = self._posiciones
+
+        # Borrado del más antiguo en las celdas llenas: se desplaza a la izquierda lo que hay tras su posición
+        llenos = activos & (self.n == self.ventana)
+        viejo = np.take_along_axis(self.llegada, self.ptr[..., None], axis=2)[..., 0]
+        pos = np.where(llenos, (self.ordenados < viejo[..., None]).sum(axis=2), self.ventana)
+        origen = np.minimum(idx + (idx >= pos[..., None]), self.ventana - 1)
+        self.ordenados = np.take_along_axis(self.ordenados, origen, axis=2)
+        self.ordenados[..., -1] = np.where(llenos, np.inf, self.ordenados[..., -1])
+
+        # Inserción del nuevo en su posición ordenada: se desplaza a la derecha lo que hay desde ella
+        pos = np.where(activos, (self.ordenados < np.where(activos, r, 0)[..., None]).sum(axis=2), self.ventana)
+        origen = np.maximum(idx - (idx > pos[..., None]), 0)
+        nuevos = np.take_along_axis(self.ordenados, origen, axis=2)
+        self.ordenados = np.where(idx == pos[..., None], r[..., None], nuevos)
+
+        self.llegada[activos, self.ptr[activos]] = r[activos]
+        self.ptr = np.where(activos, (self.ptr + 1) % self.ventana, self.ptr)
+        self.n = np.where(activos, np.minimum(self.n + 1, self.ventana), self.n)
+        return self
+
+    def calibrar(self, y_real, y_pred):
+        """
+        Calibración inicial (split conformal) con un histórico de pronósticos, p. ej. de un backtest.
+
+        Parámetros
+
+        y_real, y_pred: array-like (tiempo, estaciones, horizontes) en orden temporal.
+        """
+        y_real, y_pred = np.asarray(y_real, dtype=float), np.asarray(y_pred, dtype=float)
+        for real, pred in zip(y_real, y_pred):
+            self.actualizar(real, pred)
+        return self
+
+    def _orden(self, k):
+        # k-ésimo valor (1-based) de cada buffer; -inf/inf fuera de rango
+        k = np.asarray(k)
+        valido = (k >= 1) & (k <= self.n)
+        valor = np.take_along_axis(self.ordenados, np.clip(k - 1, 0, self.ventana - 1)[..., None], axis=2)[..., 0]
+        return valor, valido
+
+    def cuantiles(self, alpha=None):
+        """
+        Cuantiles conformes de todas las estaciones y horizontes.
+
+        Devuelve
+
+        inferior, superior: np.ndarray (estaciones, horizontes) a sumar al pronóstico puntual.
+        """
+        alpha = self.alpha if alpha is None else alpha
+        if self.simetrico:
+            q, valido = self._orden(np.ceil((self.n + 1) * (1 - alpha)).astype(int))
+            q = np.where(valido, q, np.inf)
+            return -q, q
+        inf, valido_inf = self._orden(np.floor((self.n + 1) * alpha / 2).astype(int))
+        sup, valido_sup = self._orden(np.ceil((self.n + 1) * (1 - alpha / 2)).astype(int))
+        return np.where(valido_inf, inf, -np.inf), np.where(valido_sup, sup, np.inf)
+
+    def intervalos(self, y_pred, alpha=None):
+        """
+        Intervalos de predicción para los pronósticos puntuales de todas las estaciones y horizontes.
+
+        Parámetros
+
+        y_pred: array-like o Data frame (estaciones, horizontes).
+        alpha: float, 1 - cobertura (por defecto el del constructor).
+
+        Devuelve
+
+        inferior, superior: con el mismo tipo que y_pred (Data frame si y_pred lo es).
+        """
+        pred = self._a_array(y_pred)
+        q_inf, q_sup = self.cuantiles(alpha)
+        inferior, superior = pred + q_inf, pred + q_sup
+        if isinstance(y_pred, pd.DataFrame):
+            columnas = y_pred.columns
+            return (pd.DataFrame(inferior, index=self.estaciones, columns=columnas),
+                    pd.DataFrame(superior, index=self.estaciones, columns=columnas))
+        return inferior, superior
+
+    def cobertura(self, y_real, inferior, superior):
+        """
+        Fracción de valores reales dentro del intervalo por horizonte (para vigilar la calibración).
+        """
+        y = self._a_array(y_real)
+        dentro = (y >= self._a_array(inferior)) & (y <= self._a_array(superior))
+        return np.nanmean(np.where(np.isnan(y), np.nan, dentro), axis=0)
@@ -0,0 +1,142 @@
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from utilidades import centrar, longitud_fft
+
+
+def _pares(nombres, pares, objetivo):
+    # Índices (i, j) de los pares a calcular según el criterio pedido; nombres son tuplas (estacion, variable)
+    m = len(nombres)
+    if pares is not None and not isinstance(pares, str):
+        posicion = {n: k for k, n in enumerate(nombres)}
+        return np.array([(posicion[a], posicion[b]) for a, b in pares], dtype=int).reshape(-1, 2)
+    if objetivo is not None:
+        # x cualquier serie, y la variable objetivo (para elegir exógenas y sus rezagos)
+        candidatos = [(i, j) for j in range(m) if nombres[j][1] == objetivo for i in range(m) if i != j]
+    else:
+        candidatos = list(itertools.combinations(range(m), 2))
+    if pares == "misma_estacion":
+        candidatos = [(i, j) for i, j in candidatos if nombres[i][0] == nombres[j][0]]
+    elif pares == "misma_variable":
+        candidatos = [(i, j) for i, j in candidatos if nombres[i][1] == nombres[j][1]]
+    return np.array(candidatos, dtype=int).reshape(-1, 2)
+
+
+def correlacion_cruzada_lote(X, pares, rezago_max=48, n_min=30, memoria_mb=256):
+    """
+    Correlación cruzada con rezagos -rezago_max..rezago_max de muchos pares de series con FFT por bloques.
+
+    r_ij(k) = corr(x_i(t), x_j(t + k)) con k > 0 cuando i adelanta a j. Las transformadas de x, x² y de la máscara de
+    observados se calculan una vez por serie; para cada bloque de pares se obtienen con seis correlaciones por FFT las
+    sumas Σxy, Σx, Σy, Σx², Σy² y el número de pares observados en cada rezago, y con ellas el coeficiente de Pearson
+    exacto sobre el solapamiento (el mismo valor que x.corr(y.shift(-k)) de pandas), sin bucles sobre rezagos.
+
+    Parámetros
+
+    X: array-like (n, series), puede contener NaN.
+    pares: array-like (p, 2) de índices de columna (i, j).
+    rezago_max: int, Rezago máximo L.
+    n_min: int, Pares observados mínimos para dar la correlación de un rezago (si no, NaN).
+    memoria_mb: float, Memoria aproximada por bloque de pares.
+
+    Devuelve
+
+    R: np.ndarray (p, 2L + 1) con las correlaciones.
+    N: np.ndarray (p, 2L + 1) con los pares observados de cada rezago.
+    rezagos: np.ndarray (2L + 1,) de -L a L.
+    """
+    Xc, validos = centrar(X)
+    n = len(Xc)
+    L = min(rezago_max, n - 1)
+    nfft = longitud_fft(n)
+    transformadas = {
+        "x": np.fft.rfft(Xc, nfft, axis=0),
+        "x2": np.fft.rfft(Xc ** 2, nfft, axis=0),
+        "v": np.fft.rfft(validos.astype(float), nfft, axis=0),
+    }
+    # Posiciones de la correlación circular para los rezagos -L..L (los negativos están al final)
+    posiciones = np.r_[nfft - L:nfft, 0:L + 1]
+
+    pares = np.asarray(pares, dtype=int).reshape(-1, 2)
+    tam_bloque = max(1, int(memoria_mb * 2 ** 20 // (8 * nfft * 8)))
+    R = np.empty((len(pares), 2 * L + 1))
+    N = np.empty((len(pares), 2 * L + 1))
+    for ini in range(0, len(pares), tam_bloque):
+        i, j = pares[ini:ini + tam_bloque].T
+
+        def cruzada(a, b):
+            # Σ_t a_i(t) b_j(t + k) de todos los pares del bloque
+            return np.fft.irfft(np.conj(transformadas[a][:, i]) * transformadas[b][:, j], nfft, axis=0)[posiciones].T
+
+        n_k = np.round(cruzada("v", "v"))
+        s_xy, s_x, s_y = cruzada("x", "x"), cruzada("x", "v"), cruzada("v", "x")
+        s_xx, s_yy = cruzada("x2", "v"), cruzada("v", "x2")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = (n_k * s_xy - s_x * s_y) / np.sqrt(np.maximum(n_k * s_xx - s_x ** 2, 0)
+                                                   * np.maximum(n_k * s_yy - s_y ** 2, 0))
+        R[ini:ini + tam_bloque] = np.where(n_k >= n_min, np.clip(r, -1, 1), np.nan)
+        N[ini:ini + tam_bloque] = n_k
+    return R, N, np.arange(-L, L + 1)
+
+
+def correlaciones_cruzadas(cubo, rezago_max=48, pares=None, objetivo=None, variables=None, n_min=30,
+                           memoria_mb=256):
+    """
+    Correlaciones cruzadas con rezagos entre todas las series (estación, variable) de un CuboEstaciones.
+
+    Parámetros
+
+    cubo: CuboEstaciones (las horas sin dato son NaN y no hace falta alinear nada más).
+    rezago_max: int, Rezago máximo en horas.
+    pares: None (todos los pares), "misma_estacion" (contaminantes y meteorología de cada estación),
+    "misma_variable" (entre estaciones) o lista de ((estacion, variable), (estacion, variable)).
+    objetivo: str, Variable objetivo (p. ej. "PM2.5"): solo pares (x, objetivo) con x cualquier otra serie.
+    variables: list, Variables a incluir (por defecto todas las del cubo).
+    n_min, memoria_mb: Ver correlacion_cruzada_lote.
+
+    Devuelve
+
+    Data frame con índice (estacion_x, variable_x, estacion_y, variable_y) y una columna por rezago k con
+    corr(x(t), y(t + k)).
+    """
+    sub = cubo.recortar(variables=variables)
+    T, S, V = sub.datos.shape
+    nombres = [(e, v) for e in sub.estaciones for v in sub.variables]
+    indices = _pares(nombres, pares, objetivo)
+    R, _, rezagos = correlacion_cruzada_lote(np.asarray(sub.datos, dtype=float).reshape(T, S * V), indices,
+                                             rezago_max, n_min, memoria_mb)
+    indice = pd.MultiIndex.from_tuples([(*nombres[i], *nombres[j]) for i, j in indices],
+                                       names=["estacion_x", "variable_x", "estacion_y", "variable_y"])
+    return pd.DataFrame(R, index=indice, columns=pd.Index(rezagos, name="rezago"))
+
+
+def mejores_rezagos(correlaciones, n=20, excluir_cero=False, min_abs=0.0):
+    """
+    Relaciones adelanto-retardo más fuertes: el rezago de máxima |correlación| de cada par, ordenadas de mayor a menor.
+
+    Parámetros
+
+    correlaciones: Data frame de correlaciones_cruzadas.
+    n: int, Número de pares a devolver (None para todos).
+    excluir_cero: bool, Si se ignora el rezago 0 (solo relaciones con adelanto).
+    min_abs: float, |correlación| mínima.
+
+    Devuelve
+
+    df con los nombres del par, rezago (k > 0: x adelanta a y k horas), correlacion en ese rezago y correlacion_0
+    (la simultánea, para comparar).
+    """
+    valores = correlaciones.drop(columns=0) if excluir_cero else correlaciones
+    absolutos = valores.abs().to_numpy()
+    validos = ~np.isnan(absolutos).all(axis=1)
+    mejor = np.argmax(np.where(np.isnan(absolutos), -1, absolutos), axis=1)
+    tabla = correlaciones.index.to_frame(index=False)
+    tabla["rezago"] = valores.columns.to_numpy()[mejor]
+    tabla["correlacion"] = valores.to_numpy()[np.arange(len(valores)), mejor]
+    tabla["correlacion_0"] = correlaciones[0].to_numpy()
+    tabla = tabla[validos & (tabla["correlacion"].abs() >= min_abs).to_numpy()]
+    tabla = tabla.reindex(tabla["correlacion"].abs().sort_values(ascending=False).index).reset_index(drop=True)
+    return tabla if n is None else tabla.head(n)
@@ -0,0 +1,185 @@
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+_HORA = pd.Timedelta(hours=1)
+
+
+def _huella_df(df, variables, columna_estacion):
+    # Huella del contenido (índice, estación y variables) para reconocer el mismo dataset entre sesiones
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([columna_estacion, list(variables)]).encode())
+    h.update(pd.util.hash_pandas_object(df[[columna_estacion, *variables]], index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class CuboEstaciones:
+    """
+    Dataset de toda la red como un único array denso float32 (tiempo × estación × variable) en rejilla horaria.
+
+    Sustituye los filtros repetidos con seleccionar_sede y los joins de índices: cada estación, variable o rango de
+    fechas es una vista del mismo bloque contiguo, y las horas sin dato son NaN (ver mascara). El cubo puede vivir en
+    memoria o en un memmap y se guarda en disco (.npy + metadatos JSON) con la huella del dataset de origen.
+
+    Parámetros
+
+    datos: np.ndarray o np.memmap (tiempo, estaciones, variables).
+    indice: DatetimeIndex horario del primer eje.
+    estaciones: list, Códigos de estación del segundo eje.
+    variables: list, Nombres de las variables del tercer eje.
+    """
+
+    def __init__(self, datos, indice, estaciones, variables):
+        self.datos = datos
+        self.indice = indice
+        self.estaciones = list(estaciones)
+        self.variables = list(variables)
+        self._pos_estacion = {e: i for i, e in enumerate(self.estaciones)}
+        self._pos_variable = {v: i for i, v in enumerate(self.variables)}
+
+    @classmethod
+    def desde_df(cls, df, variables=None, columna_estacion="code", directorio_cache=None, memmap=False):
+        """
+        Construye el cubo desde el dataset largo (o lo recupera de la caché de disco si ya existe).
+
+        Parámetros
+
+        df: Data frame largo indexado por fecha con la columna de estación (las filas sin código se descartan).
+        variables: list, Columnas a incluir (por defecto todas las numéricas).
+        columna_estacion: str, Columna con el código de la estación.
+        directorio_cache: str, Carpeta donde guardar/buscar el cubo; None para no usar caché.
+        memmap: bool, Si el cubo cacheado se abre mapeado en memoria en lugar de cargarse entero.
+
+        Devuelve
+
+        CuboEstaciones.
+        """
+        variables = list(df.select_dtypes(include=["number"]).columns if variables is None else variables)
+        if directorio_cache is not None:
+            base = os.path.join(directorio_cache, "cubo_" + _huella_df(df, variables, columna_estacion))
+            if os.path.exists(base + ".json"):
+                return cls.cargar(base, memmap)
+
+        # Posición de cada fila en la rejilla y escritura de todas a la vez (la primera lectura de cada hora gana)
+        codigos, estaciones = pd.factorize(df[columna_estacion], sort=True)
+        # Las filas sin código de estación (factorize da -1) se descartan: con índice -1 escribirían en la última
+        # estación del cubo
+        validas = codigos >= 0
+        codigos = codigos[validas]
+        horas = pd.DatetimeIndex(df.index[validas]).floor("h")
+        inicio = horas.min()
+        t = np.asarray((horas - inicio) // _HORA, dtype=np.int64)
+        _, unicas = np.unique(t * len(estaciones) + codigos, return_index=True)
+
+        datos = np.full((t.max() + 1, len(estaciones), len(variables)), np.nan, dtype=np.float32)
+        datos[t[unicas], codigos[unicas]] = df.loc[validas, variables].to_numpy(dtype=np.float32)[unicas]
+        indice = pd.date_range(inicio, periods=len(datos), freq="h")
+        cubo = cls(datos, indice, estaciones, variables)
+
+        if directorio_cache is not None:
+            os.makedirs(directorio_cache, exist_ok=True)
+            cubo.guardar(base)
+            if memmap:
+                return cls.cargar(base, memmap=True)
+        return cubo
+
+    def guardar(self, base):
+        """
+        Guarda el cubo en base.npy y sus metadatos en base.json.
+        """
+        np.save(base + ".npy", np.ascontiguousarray(self.datos, dtype=np.float32))
+        with open(base + ".json", "w") as f:
+            json.dump({"inicio": self.indice[0].isoformat(), "n_horas": len(self.indice),
+                       "estaciones": [str(e) for e in self.estaciones], "variables": self.variables}, f)
+
+    @classmethod
+    def cargar(cls, base, memmap=False):
+        """
+        Abre un cubo guardado con guardar (mapeado en memoria si memmap=True).
+        """
+        with open(base + ".json") as f:
+            meta = json.load(f)
+        datos = np.load(base + ".npy", mmap_mode="r" if memmap else None)
+        indice = pd.date_range(meta["inicio"], periods=meta["n_horas"], freq="h")
+        return cls(datos, indice, meta["estaciones"], meta["variables"])
+
+    @property
+    def forma(self):
+        return self.datos.shape
+
+    @property
+    def mascara(self):
+        """
+        Array booleano (tiempo, estaciones, variables) con True donde hay dato.
+        """
+        return ~np.isnan(self.datos)
+
+    def cobertura(self):
+        """
+        Fracción de horas con dato por estación (filas) y variable (columnas).
+        """
+        return pd.DataFrame(self.mascara.mean(axis=0), index=self.estaciones, columns=self.variables)
+
+    def estacion(self, codigo):
+        """
+        Data frame (tiempo × variable) de una estación sobre una vista del cubo (equivale a seleccionar_sede).
+        """
+        return pd.DataFrame(self.datos[:, self._pos_estacion[codigo], :], index=self.indice, columns=self.variables,
+                            copy=False)
+
+    def variable(self, nombre):
+        """
+        Data frame ancho (tiempo × estación) de una variable sobre una vista del cubo.
+        """
+        return pd.DataFrame(self.datos[:, :, self._pos_variable[nombre]], index=self.indice, columns=self.estaciones,
+                            copy=False)
+
+    def recortar(self, inicio=None, fin=None, estaciones=None, variables=None):
+        """
+        Sub-cubo por rango de fechas (inclusivo), estaciones y variables; el rango de fechas es una vista.
+        """
+        desde = 0 if inicio is None else self.indice.searchsorted(pd.Timestamp(inicio))
+        hasta = len(self.indice) if fin is None else self.indice.searchsorted(pd.Timestamp(fin), side="right")
+        datos = self.datos[desde:hasta]
+        estaciones = self.estaciones if estaciones is None else list(estaciones)
+        variables = self.variables if variables is None else list(variables)
+        if estaciones != self.estaciones:
+            datos = datos[:, [self._pos_estacion[e] for e in estaciones]]
+        if variables != self.variables:
+            datos = datos[:, :, [self._pos_variable[v] for v in variables]]
+        return CuboEstaciones(datos, self.indice[desde:hasta], estaciones, variables)
+
+    def panel(self, variables=None, completo=True):
+        """
+        Panel (estaciones, tiempo, variables) en float64 con el formato de modelo_var.panel_desde_df.
+
+        Parámetros
+
+        variables: list, Variables del panel (por defecto todas).
+        completo: bool, Si solo se conservan las horas con todas las estaciones y variables observadas (como el
+        dropna() de panel_desde_df).
+
+        Devuelve
+
+        Y, estaciones, indice.
+        """
+        sub = self.recortar(variables=variables)
+        indice = sub.indice
+        datos = sub.datos
+        if completo:
+            completas = sub.mascara.all(axis=(1, 2))
+            datos, indice = datos[completas], indice[completas]
+        return np.ascontiguousarray(datos.transpose(1, 0, 2), dtype=float), sub.estaciones, indice
+
+    def a_largo(self, columna_estacion="code"):
+        """
+        Vuelve al formato largo (una fila por estación y hora con algún dato).
+        """
+        largo = pd.DataFrame(self.datos.reshape(-1, len(self.variables)), columns=self.variables)
+        largo.insert(0, columna_estacion, np.tile(self.estaciones, len(self.indice)))
+        largo.index = np.repeat(self.indice, len(self.estaciones))
+        return largo[self.mascara.any(axis=2).ravel()]
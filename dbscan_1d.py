@@ -0,0 +1,260 @@
+
+import numpy as np
+import pandas as pd
+
+from silueta import silueta, silueta_1d
+
+
+def _ordenar(x):
+    x = np.asarray(x, dtype=float)
+    if x.ndim == 2:
+        if x.shape[1] != 1:
+            raise ValueError("dbscan_1d solo admite una variable (una columna)")
+        x = x[:, 0]
+    orden = np.argsort(x, kind="stable")
+    return x[orden], orden
+
+
+def conteo_vecinos_1d(xs, eps):
+    """
+    Número de puntos a distancia <= eps de cada punto (incluido él mismo) sobre valores ya ordenados.
+
+    En 1-D los vecinos forman un rango contiguo en el orden, así que basta con buscar sus dos extremos: O(n log n) y
+    O(n) memoria. Los extremos se buscan comparando la diferencia |x_j - x_i| con eps, como sklearn, y no con
+    searchsorted sobre x_i ± eps, cuyo redondeo cambia los puntos a distancia exactamente eps.
+    """
+    n = len(xs)
+    i = np.arange(n)
+    # Primer j >= i con x_j - x_i > eps
+    lo, hi = i.copy(), np.full(n, n)
+    while np.any(activo := lo < hi):
+        mid = np.where(activo, (lo + hi) // 2, 0)
+        fuera = xs[mid] - xs > eps
+        hi = np.where(activo & fuera, mid, hi)
+        lo = np.where(activo & ~fuera, mid + 1, lo)
+    derecha = lo
+    # Primer j <= i con x_i - x_j <= eps
+    lo, hi = np.zeros(n, dtype=int), i.copy()
+    while np.any(activo := lo < hi):
+        mid = (lo + hi) // 2
+        dentro = xs - xs[mid] <= eps
+        hi = np.where(activo & dentro, mid, hi)
+        lo = np.where(activo & ~dentro, mid + 1, lo)
+    return derecha - lo
+
+
+def _etiquetas_ordenadas(xs, orden, nucleo, eps):
+    # Etiquetas en el orden de xs a partir de la máscara de puntos núcleo
+    n = len(xs)
+    etiquetas = np.full(n, -1)
+    pos = np.flatnonzero(nucleo)
+    if len(pos) == 0:
+        return etiquetas
+
+    # Dos núcleos consecutivos a más de eps empiezan una componente nueva
+    nuevo = np.r_[True, np.diff(xs[pos]) > eps]
+    comp = np.cumsum(nuevo) - 1
+    inicios = np.flatnonzero(nuevo)
+
+    # sklearn numera los clusters según el primer núcleo que encuentra al recorrer los datos en su orden original
+    primero = np.minimum.reduceat(orden[pos], inicios)
+    etiqueta_comp = np.empty(len(inicios), dtype=int)
+    etiqueta_comp[np.argsort(primero, kind="stable")] = np.arange(len(inicios))
+    etiquetas[pos] = etiqueta_comp[comp]
+
+    # Puntos frontera: solo pueden alcanzarles el núcleo más cercano por la izquierda y por la derecha
+    idx = np.arange(n)
+    izq = np.maximum.accumulate(np.where(nucleo, idx, -1))
+    der = np.minimum.accumulate(np.where(nucleo, idx, n)[::-1])[::-1]
+    frontera = ~nucleo
+
+    et_izq = np.where((izq >= 0) & (xs - xs[np.maximum(izq, 0)] <= eps), etiquetas[np.maximum(izq, 0)], n)
+    et_der = np.where((der < n) & (xs[np.minimum(der, n - 1)] - xs <= eps), etiquetas[np.minimum(der, n - 1)], n)
+
+    # Si la alcanzan dos clusters, sklearn le asigna el que expande primero (la etiqueta menor)
+    et = np.minimum(et_izq, et_der)
+    etiquetas[frontera] = np.where(et[frontera] < n, et[frontera], -1)
+    return etiquetas
+
+
+def dbscan_1d(x, eps=0.5, min_samples=5, devolver_nucleos=False):
+    """
+    DBSCAN para una sola variable (p. ej. PM2.5 estandarizado) basado en ordenar y en searchsorted.
+
+    Devuelve las mismas etiquetas que sklearn.cluster.DBSCAN (métrica euclídea) pero en O(n log n) tiempo y O(n) memoria,
+    sin construir las listas de vecinos (tests/test_dbscan_1d.py comprueba la paridad, con empates y puntos frontera).
+
+    Parámetros
+
+    x: array-like (n,) o (n, 1), Valores a agrupar.
+    eps: float, Radio de vecindad.
+    min_samples: int, Número mínimo de puntos en la vecindad (incluido el propio punto) para ser núcleo.
+    devolver_nucleos: bool, Si se devuelven también los índices de los puntos núcleo.
+
+    Devuelve
+
+    etiquetas: np.ndarray (n,) con el cluster de cada punto (-1 = ruido).
+    nucleos: np.ndarray con los índices de los puntos núcleo (solo si devolver_nucleos es True).
+    """
+    xs, orden = _ordenar(x)
+    nucleo = conteo_vecinos_1d(xs, eps) >= min_samples
+
+    etiquetas = np.empty(len(xs), dtype=int)
+    etiquetas[orden] = _etiquetas_ordenadas(xs, orden, nucleo, eps)
+
+    if devolver_nucleos:
+        return etiquetas, np.sort(orden[nucleo])
+    return etiquetas
+
+
+def distancia_k_1d(xs, k):
+    """
+    Distancia al k-ésimo vecino más cercano (contando el propio punto) de cada valor ya ordenado.
+
+    Es el menor eps con el que el punto tiene al menos k vecinos, es decir, el punto es núcleo con min_samples = k
+    para todo eps >= distancia_k. Los k vecinos forman una ventana contigua del orden; su posición se busca con una
+    búsqueda binaria vectorizada (O(n log k)).
+    """
+    n = len(xs)
+    k = min(k, n)
+    i = np.arange(n)
+    # j es el inicio de la ventana [j, j + k - 1] que contiene a i
+    lo = np.maximum(0, i - k + 1)
+    hi = np.minimum(i, n - k)
+    # Primer j en el que la distancia hacia la derecha ya supera a la de la izquierda
+    while np.any(activo := lo < hi):
+        mid = (lo + hi) // 2
+        derecha_mayor = xs[mid + k - 1] - xs >= xs - xs[mid]
+        hi = np.where(activo & derecha_mayor, mid, hi)
+        lo = np.where(activo & ~derecha_mayor, mid + 1, lo)
+    j = lo
+    d = np.maximum(xs - xs[j], xs[j + k - 1] - xs)
+    previo = np.maximum(j - 1, np.maximum(0, i - k + 1))
+    d_previo = np.maximum(xs - xs[previo], xs[previo + k - 1] - xs)
+    return np.minimum(d, d_previo)
+
+
+def _barrido_1d(x, eps_values, min_samples, con_silueta):
+    xs, orden = _ordenar(x)
+    n = len(xs)
+    r = distancia_k_1d(xs, min_samples)
+    idx = np.arange(n)
+
+    filas = []
+    for eps in eps_values:
+        nucleo = r <= eps
+        pos = np.flatnonzero(nucleo)
+        n_clusters = int(len(pos) > 0) + int(np.sum(np.diff(xs[pos]) > eps))
+
+        # Ruido: puntos no núcleo sin ningún núcleo a distancia <= eps por ninguno de los dos lados
+        izq = np.maximum.accumulate(np.where(nucleo, idx, -1))
+        der = np.minimum.accumulate(np.where(nucleo, idx, n)[::-1])[::-1]
+        por_izq = (izq >= 0) & (xs - xs[np.maximum(izq, 0)] <= eps)
+        por_der = (der < n) & (xs[np.minimum(der, n - 1)] - xs <= eps)
+        alcanzado = por_izq | por_der
+        fila = (eps, n_clusters, int(np.sum(~nucleo & ~alcanzado)))
+
+        if con_silueta:
+            # Como en el notebook: sin puntos ruido y solo si hay al menos dos clusters
+            etiquetas = _etiquetas_ordenadas(xs, orden, nucleo, eps)
+            fila += (silueta_1d(xs, etiquetas, excluir_ruido=True) if n_clusters >= 2 else np.nan,)
+        filas.append(fila)
+    return filas
+
+
+def _barrido_nd(X, eps_values, min_samples, con_silueta):
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+    from sklearn.neighbors import NearestNeighbors
+
+    # Un único grafo de vecinos con el eps máximo; cada eps se obtiene filtrando sus aristas
+    nn = NearestNeighbors(radius=max(eps_values)).fit(X)
+    r = nn.kneighbors(n_neighbors=min_samples - 1)[0][:, -1] if min_samples > 1 else np.zeros(len(X))
+    grafo = nn.radius_neighbors_graph(mode="distance").tocoo()
+
+    filas = []
+    for eps in eps_values:
+        nucleo = r <= eps
+        arista = grafo.data <= eps
+        fila, col = grafo.row[arista], grafo.col[arista]
+
+        entre_nucleos = nucleo[fila] & nucleo[col]
+        sub = np.flatnonzero(nucleo)
+        mapa = np.full(len(X), -1)
+        mapa[sub] = np.arange(len(sub))
+        g = coo_matrix((np.ones(entre_nucleos.sum()), (mapa[fila[entre_nucleos]], mapa[col[entre_nucleos]])),
+                       shape=(len(sub), len(sub)))
+        n_clusters = connected_components(g, directed=False)[0] if len(sub) else 0
+
+        alcanzado = nucleo.copy()
+        alcanzado[fila[nucleo[col]]] = True
+        resultado = (eps, int(n_clusters), int(np.sum(~alcanzado)))
+
+        if con_silueta:
+            etiquetas = np.full(len(X), -1)
+            if len(sub):
+                etiquetas[sub] = connected_components(g, directed=False)[1]
+                # Cada punto frontera toma el cluster de uno de sus núcleos vecinos
+                frontera = ~nucleo[fila] & nucleo[col]
+                etiquetas[fila[frontera]] = etiquetas[col[frontera]]
+            resultado += (silueta(X, etiquetas, excluir_ruido=True) if n_clusters >= 2 else np.nan,)
+        filas.append(resultado)
+    return filas
+
+
+def barrido_eps(X, eps_values, min_samples=5, con_silueta=False):
+    """
+    Número de clusters y de puntos ruido de DBSCAN para toda una rejilla de eps sin reajustar DBSCAN en cada valor.
+
+    En 1-D se ordena una sola vez y se calcula la distancia al min_samples-ésimo vecino: un punto es núcleo para
+    todo eps mayor o igual que esa distancia, y los clusters son tramos de núcleos separados por huecos <= eps.
+    Con varias variables se construye una sola vez el grafo de vecinos con el eps máximo y se filtra para cada eps.
+
+    Parámetros
+
+    X: array-like (n,) o (n, variables), Datos (p. ej. PM2.5 estandarizado).
+    eps_values: array-like, Rejilla de eps (p. ej. np.arange(0.005, 0.25, 0.001)).
+    min_samples: int, Igual que en DBSCAN.
+    con_silueta: bool, Añade la silueta sin puntos ruido (exacta en 1-D, muestreada con varias variables).
+
+    Devuelve
+
+    df con columnas eps, n_clusters, n_ruido (y silueta si con_silueta es True).
+    """
+    X = np.asarray(X, dtype=float)
+    eps_values = np.asarray(eps_values, dtype=float)
+    if X.ndim == 1 or X.shape[1] == 1:
+        filas = _barrido_1d(X, eps_values, min_samples, con_silueta)
+    else:
+        filas = _barrido_nd(X, eps_values, min_samples, con_silueta)
+    return pd.DataFrame(filas, columns=["eps", "n_clusters", "n_ruido"] + (["silueta"] if con_silueta else []))
+
+
+def sugerir_eps(X, min_samples=5):
+    """
+    Sugiere eps como el codo de la curva de distancias al min_samples-ésimo vecino ordenadas (método Kneedle).
+
+    Parámetros
+
+    X: array-like (n,) o (n, variables).
+    min_samples: int, Igual que en DBSCAN.
+
+    Devuelve
+
+    eps: float, Valor sugerido.
+    distancias: np.ndarray ordenado de distancias k para dibujar la curva.
+    """
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1 or X.shape[1] == 1:
+        xs, _ = _ordenar(X)
+        distancias = np.sort(distancia_k_1d(xs, min_samples))
+    else:
+        from sklearn.neighbors import NearestNeighbors
+        distancias = np.sort(NearestNeighbors().fit(X).kneighbors(n_neighbors=min_samples - 1)[0][:, -1])
+
+    # Curva creciente y convexa: el codo es el punto más alejado por debajo de la recta entre extremos
+    t = np.linspace(0, 1, len(distancias))
+    rango = distancias[-1] - distancias[0]
+    y = (distancias - distancias[0]) / rango if rango > 0 else t
+    codo = int(np.argmax(t - y))
+    return float(distancias[codo]), distancias
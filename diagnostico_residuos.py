@@ -0,0 +1,161 @@
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.stats import chi2
+
+from periodos import acf_lote
+
+
+def matriz_residuos(residuos):
+    """
+    Pasa los residuos de muchos modelos a una matriz (tiempo, series) rellenando con NaN las series más cortas.
+
+    Parámetros
+
+    residuos: dict {nombre: array-like}, Data frame (una columna por serie) o np.ndarray.
+
+    Devuelve
+
+    E: np.ndarray (n_max, series).
+    nombres: list con el nombre de cada columna.
+    """
+    if isinstance(residuos, pd.DataFrame):
+        return residuos.to_numpy(dtype=float), list(residuos.columns)
+    if isinstance(residuos, dict):
+        nombres = list(residuos)
+        series = [np.asarray(residuos[k], dtype=float).ravel() for k in nombres]
+        E = np.full((max(len(s) for s in series), len(series)), np.nan)
+        for j, s in enumerate(series):
+            E[:len(s), j] = s
+        return E, nombres
+    E = np.asarray(residuos, dtype=float).reshape(len(residuos), -1)
+    return E, list(range(E.shape[1]))
+
+
+def residuos_de(resultados):
+    """
+    Residuos de un diccionario de modelos ajustados de statsmodels ({(estacion, modelo): resultados}).
+    """
+    return {clave: np.asarray(res.resid, dtype=float) for clave, res in resultados.items()}
+
+
+def ljung_box(E, rezagos=(10, 24), gl_modelo=0):
+    """
+    Estadístico Q de Ljung-Box de todas las series y rezagos a partir de una sola ACF con FFT.
+
+    Parámetros
+
+    E: np.ndarray (n, series), puede contener NaN al final (series de distinta longitud).
+    rezagos: iterable de int, Rezagos h en los que se evalúa Q(h).
+    gl_modelo: int o array-like (series,), Parámetros ARMA a descontar de los grados de libertad (p + q).
+
+    Devuelve
+
+    Q, p_valor: np.ndarray (len(rezagos), series).
+    """
+    rezagos = np.asarray(list(rezagos))
+    n = (~np.isnan(E)).sum(axis=0)
+    rho = acf_lote(E, rezagos.max(), ajustada=False)[1:]
+    k = np.arange(1, rezagos.max() + 1)[:, None]
+    Q_acumulado = n * (n + 2) * np.cumsum(rho ** 2 / (n - k), axis=0)
+    Q = Q_acumulado[rezagos - 1]
+    gl = np.maximum(rezagos[:, None] - np.asarray(gl_modelo), 1)
+    return Q, chi2.sf(Q, gl)
+
+
+def jarque_bera(E):
+    """
+    Estadístico de Jarque-Bera de todas las series (asimetría y curtosis sin corregir, como statsmodels).
+
+    Devuelve
+
+    JB, p_valor: np.ndarray (series,).
+    """
+    n = (~np.isnan(E)).sum(axis=0)
+    d = E - np.nanmean(E, axis=0)
+    m2 = np.nanmean(d ** 2, axis=0)
+    asimetria = np.nanmean(d ** 3, axis=0) / m2 ** 1.5
+    curtosis = np.nanmean(d ** 4, axis=0) / m2 ** 2
+    JB = n / 6 * (asimetria ** 2 + (curtosis - 3) ** 2 / 4)
+    return JB, chi2.sf(JB, 2)
+
+
+def arch_lm(E, rezagos=12):
+    """
+    Contraste ARCH-LM de Engle de todas las series: regresión de e²_t sobre e²_{t-1..t-q} resuelta en lote.
+
+    Las regresiones de todas las series se resuelven con un único np.linalg.solve sobre las matrices de Gram
+    (filas con NaN fuera mediante una máscara), y LM = nobs · R² con nobs = n - q, igual que het_arch de statsmodels.
+
+    Parámetros
+
+    E: np.ndarray (n, series).
+    rezagos: int, Orden q del contraste.
+
+    Devuelve
+
+    LM, p_valor: np.ndarray (series,).
+    """
+    e2 = E ** 2
+    # Ventanas (n - q, series, q + 1): la última posición es e²_t y las anteriores sus rezagos
+    ventanas = sliding_window_view(e2, rezagos + 1, axis=0)
+    validas = ~np.isnan(ventanas).any(axis=2)
+    ventanas = np.where(validas[..., None], ventanas, 0.0)
+    y = ventanas[..., -1].T
+    X = np.concatenate([validas[..., None].astype(float), ventanas[..., :-1]], axis=2).transpose(1, 0, 2)
+    w = validas.T.astype(float)
+
+    XtX = np.einsum("stj,stk->sjk", X, X)
+    Xty = np.einsum("stj,st->sj", X, y)
+    beta = np.linalg.solve(XtX + 1e-12 * np.eye(rezagos + 1), Xty[..., None])[..., 0]
+    nobs = w.sum(axis=1)
+    media_y = (y * w).sum(axis=1) / nobs
+    sst = ((y - media_y[:, None]) ** 2 * w).sum(axis=1)
+    ssr = ((y - np.einsum("stj,sj->st", X, beta)) ** 2 * w).sum(axis=1)
+    LM = nobs * (1 - ssr / sst)
+    return LM, chi2.sf(LM, rezagos)
+
+
+def diagnosticar(residuos, rezagos_lb=(10, 24), rezagos_arch=12, gl_modelo=0, alpha=0.05,
+                 exigir=("ljung_box", "jarque_bera", "arch")):
+    """
+    Diagnóstico de los residuos de todos los modelos (estación × modelo) con una tabla de aprobados/suspensos.
+
+    Un modelo pasa Ljung-Box si no hay autocorrelación en ningún rezago de rezagos_lb, Jarque-Bera si no se rechaza la
+    normalidad y ARCH si no hay heterocedasticidad condicional, todo al nivel alpha. La columna 'pasa' exige las
+    pruebas de 'exigir' (con series muy largas Jarque-Bera rechaza casi siempre y puede convenir quitarla).
+
+    Parámetros
+
+    residuos: dict {(estacion, modelo): array}, Data frame o np.ndarray (ver matriz_residuos y residuos_de).
+    rezagos_lb: iterable de int, Rezagos de Ljung-Box.
+    rezagos_arch: int, Orden del contraste ARCH-LM.
+    gl_modelo: int o array-like, Grados de libertad a descontar en Ljung-Box (p + q de cada modelo).
+    alpha: float, Nivel de significación.
+    exigir: tuple, Pruebas necesarias para 'pasa'.
+
+    Devuelve
+
+    df indexado por serie con n, Q y p-valor de cada rezago de Ljung-Box, JB, ARCH-LM, sus p-valores y las columnas
+    booleanas pasa_ljung_box, pasa_jarque_bera, pasa_arch y pasa.
+    """
+    E, nombres = matriz_residuos(residuos)
+    rezagos_lb = list(rezagos_lb)
+    Q, p_lb = ljung_box(E, rezagos_lb, gl_modelo)
+    JB, p_jb = jarque_bera(E)
+    LM, p_arch = arch_lm(E, rezagos_arch)
+
+    indice = pd.MultiIndex.from_tuples(nombres) if all(isinstance(k, tuple) for k in nombres) else nombres
+    tabla = pd.DataFrame({"n": (~np.isnan(E)).sum(axis=0)}, index=indice)
+    for i, h in enumerate(rezagos_lb):
+        tabla[f"lb_q_{h}"] = Q[i]
+        tabla[f"lb_p_{h}"] = p_lb[i]
+    tabla["jb"], tabla["jb_p"] = JB, p_jb
+    tabla["arch_lm"], tabla["arch_p"] = LM, p_arch
+
+    tabla["pasa_ljung_box"] = (p_lb > alpha).all(axis=0)
+    tabla["pasa_jarque_bera"] = p_jb > alpha
+    tabla["pasa_arch"] = p_arch > alpha
+    tabla["pasa"] = tabla[[f"pasa_{prueba}" for prueba in exigir]].all(axis=1)
+    return tabla
@@ -0,0 +1,196 @@
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+class CombinadorPronosticos:
+    """
+    Combinación de los pronósticos de los modelos base (ARIMA, SARIMA, SARIMAX, RF, XGB, LSTM...) de todas las
+    estaciones con pesos que se actualizan en línea.
+
+    Los últimos pronósticos de cada modelo se guardan en una caché (estaciones, modelos, horizontes), de modo que un
+    modelo que se reentrena o reemite solo sobrescribe sus filas. Con cada valor real que llega se actualizan, con
+    olvido exponencial, el error cuadrático medio de cada modelo (pesos inversos al error) y la matriz E'E de productos
+    de errores de la regresión de stacking, sin reajustar ningún modelo base. La combinación de todas las estaciones es un único
+    producto pesos × pronósticos; los modelos sin pronóstico en la caché (NaN) se excluyen y los pesos se renormalizan.
+
+    Parámetros
+
+    estaciones: list, Códigos de estación.
+    modelos: list, Nombres de los modelos base.
+    horizontes: int, Número de horizontes de pronóstico.
+    metodo: str, "inverso" (pesos ∝ 1 / ECM^potencia) o "stacking" (mínimos cuadrados con pesos no negativos que suman
+    1, resueltos con la restricción en lugar de recortar y reescalar).
+    semivida: float, Actualizaciones tras las que el peso de un error se reduce a la mitad.
+    potencia: float, Exponente de los pesos inversos (2 da más peso al mejor modelo).
+    ridge: float, Regularización de la regresión de stacking (relativa a la traza de E'E).
+    """
+
+    def __init__(self, estaciones, modelos, horizontes=1, metodo="inverso", semivida=168, potencia=1.0, ridge=1e-3):
+        self.estaciones = list(estaciones)
+        self.modelos = list(modelos)
+        self.horizontes = horizontes
+        self.metodo = metodo
+        self.olvido = 0.5 ** (1 / semivida)
+        self.potencia = potencia
+        self.ridge = ridge
+        S, M, H = len(self.estaciones), len(self.modelos), horizontes
+        self.cache = np.full((S, M, H), np.nan)
+        self.ecm = np.full((S, M, H), np.nan)
+        self.EtE = np.zeros((S, H, M, M))
+        self.n = np.zeros((S, H))
+
+    def registrar(self, modelo, predicciones, estaciones=None):
+        """
+        Guarda en la caché los pronósticos de un modelo.
+
+        Parámetros
+
+        modelo: str, Nombre del modelo.
+        predicciones: array-like (estaciones, horizontes), Data frame indexado por estación o dict {estacion: array}.
+        estaciones: list, Estaciones de las filas de predicciones si es un array (por defecto todas).
+        """
+        if isinstance(predicciones, dict):
+            estaciones = list(predicciones)
+            predicciones = np.stack([np.asarray(predicciones[e], dtype=float).ravel() for e in estaciones])
+        elif isinstance(predicciones, (pd.DataFrame, pd.Series)):
+            estaciones = list(predicciones.index)
+        estaciones = self.estaciones if estaciones is None else estaciones
+        filas = [self.estaciones.index(e) for e in estaciones]
+        self.cache[filas, self.modelos.index(modelo)] = np.asarray(predicciones, dtype=float).reshape(
+            len(filas), self.horizontes)
+        return self
+
+    def olvidar(self, modelo=None, estaciones=None):
+        """
+        Borra de la caché los pronósticos de un modelo o estaciones (p. ej. cuando quedan obsoletos).
+        """
+        filas = slice(None) if estaciones is None else [self.estaciones.index(e) for e in estaciones]
+        columnas = slice(None) if modelo is None else self.modelos.index(modelo)
+        self.cache[filas, columnas] = np.nan
+        return self
+
+    def actualizar(self, y_real, predicciones=None):
+        """
+        Actualiza los errores y la regresión de stacking con los valores reales.
+
+        Parámetros
+
+        y_real: array-like o Data frame (estaciones, horizontes); NaN donde no hay dato.
+        predicciones: array-like (estaciones, modelos, horizontes) emitidos para esos valores reales (por defecto la
+        caché actual).
+        """
+        if isinstance(y_real, pd.DataFrame):
+            y_real = y_real.reindex(self.estaciones)
+        y = np.asarray(y_real, dtype=float).reshape(len(self.estaciones), self.horizontes)
+        X = self.cache if predicciones is None else np.asarray(predicciones, dtype=float)
+
+        e2 = (X - y[:, None, :]) ** 2
+        valido = ~np.isnan(e2)
+        nuevo = np.where(np.isnan(self.ecm), e2, self.olvido * self.ecm + (1 - self.olvido) * e2)
+        self.ecm = np.where(valido, nuevo, self.ecm)
+
+        # Stacking: solo los instantes en que todos los modelos tienen pronóstico
+        completo = ~np.isnan(y) & ~np.isnan(X).any(axis=1)
+        # Con pesos que suman 1, y - Xw = -Ew, de modo que basta acumular los productos de los errores (el sesgo de
+        # cada modelo queda incluido)
+        Eh = np.where(completo[:, None, :], X - y[:, None, :], 0.0).transpose(0, 2, 1)
+        olvido = np.where(completo, self.olvido, 1.0)
+        self.EtE = olvido[..., None, None] * self.EtE + np.einsum("shi,shj->shij", Eh, Eh)
+        self.n = olvido * self.n + completo
+        return self
+
+    def _pesos_inversos(self, disponibles):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w = np.where(disponibles & ~np.isnan(self.ecm), np.maximum(self.ecm, 1e-12) ** -self.potencia, 0.0)
+        # Sin historial de errores: media simple de los modelos disponibles
+        sin_historial = w.sum(axis=1, keepdims=True) == 0
+        return np.where(sin_historial, disponibles.astype(float), w)
+
+    def _pesos_stacking(self, disponibles):
+        # Mínimos cuadrados min w'E'Ew con pesos >= 0 que suman 1 (sistema KKT de la restricción de igualdad resuelto en lote) por
+        # conjunto activo: los modelos no disponibles empiezan fijados a 0 y en cada vuelta se fija a 0 el peso más
+        # negativo de cada estación y horizonte hasta que no queda ninguno
+        M = len(self.modelos)
+        escala = np.trace(self.EtE, axis1=2, axis2=3)[..., None, None] / M
+        # La regularización (con la suma fijada a 1) atrae los pesos hacia los iguales cuando hay poco historial
+        A = self.EtE + self.ridge * np.maximum(escala, 1e-12) * np.eye(M)
+        libres = disponibles.transpose(0, 2, 1).copy()
+        identidad = np.eye(M, dtype=bool)
+        for _ in range(M):
+            fijo = ~libres
+            K = np.zeros(A.shape[:2] + (M + 1, M + 1))
+            K[..., :M, :M] = np.where(fijo[..., :, None] | fijo[..., None, :], identidad, A)
+            K[..., :M, M] = K[..., M, :M] = libres
+            # Sin ningún modelo libre el multiplicador no está determinado: se fija a 0 (pesos nulos)
+            K[..., M, M] = ~libres.any(axis=-1)
+            rhs = np.concatenate([np.zeros(libres.shape), libres.any(axis=-1, keepdims=True)], axis=-1)
+            w = np.linalg.solve(K, rhs[..., None])[..., :M, 0]
+            negativos = libres & (w < -1e-12)
+            if not negativos.any():
+                break
+            peor = np.argmin(np.where(negativos, w, np.inf), axis=-1)
+            libres &= ~(negativos.any(axis=-1, keepdims=True) & (np.arange(M) == peor[..., None]))
+        w = np.clip(np.where(libres, w, 0.0), 0, None).transpose(0, 2, 1)
+        # Sin historial: media simple de los modelos disponibles
+        sin_historial = (self.n == 0)[:, None, :]
+        return np.where(sin_historial, disponibles.astype(float), w)
+
+    def pesos(self, predicciones=None):
+        """
+        Pesos de cada estación, modelo y horizonte (suman 1 sobre los modelos con pronóstico disponible).
+
+        Devuelve
+
+        np.ndarray (estaciones, modelos, horizontes).
+        """
+        X = self.cache if predicciones is None else np.asarray(predicciones, dtype=float)
+        disponibles = ~np.isnan(X)
+        w = self._pesos_stacking(disponibles) if self.metodo == "stacking" else self._pesos_inversos(disponibles)
+        with np.errstate(invalid="ignore"):
+            return w / w.sum(axis=1, keepdims=True)
+
+    def combinar(self, predicciones=None):
+        """
+        Pronóstico combinado de todas las estaciones y horizontes en una sola pasada.
+
+        Parámetros
+
+        predicciones: array-like (estaciones, modelos, horizontes) (por defecto la caché).
+
+        Devuelve
+
+        Data frame (estaciones, horizontes) con el pronóstico combinado (NaN si ningún modelo tiene pronóstico).
+        """
+        X = self.cache if predicciones is None else np.asarray(predicciones, dtype=float)
+        combinado = np.einsum("smh,smh->sh", self.pesos(X), np.nan_to_num(X))
+        combinado[np.isnan(X).all(axis=1)] = np.nan
+        return pd.DataFrame(combinado, index=self.estaciones, columns=range(1, self.horizontes + 1))
+
+    def tabla_pesos(self):
+        """
+        Pesos actuales en formato largo.
+
+        Devuelve
+
+        df con estacion, modelo, horizonte, peso y rmse (raíz del ECM móvil).
+        """
+        indice = pd.MultiIndex.from_product([self.estaciones, self.modelos, range(1, self.horizontes + 1)],
+                                            names=["estacion", "modelo", "horizonte"])
+        return pd.DataFrame({"peso": self.pesos().ravel(), "rmse": np.sqrt(self.ecm).ravel()},
+                            index=indice).reset_index()
+
+    def errores(self):
+        """
+        RMSE móvil medio sobre los horizontes de cada modelo y estación (la comparación de MSE del notebook).
+
+        Devuelve
+
+        Data frame (estaciones, modelos).
+        """
+        with warnings.catch_warnings():
+            # Modelos sin ningún error registrado todavía: NaN sin aviso de media vacía
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return pd.DataFrame(np.sqrt(np.nanmean(self.ecm, axis=2)), index=self.estaciones, columns=self.modelos)
@@ -0,0 +1,213 @@
+
+import numpy as np
+import pandas as pd
+
+from utilidades import trozos
+
+_MOMENTOS = ("n", "media", "M2", "M3", "M4", "min", "max")
+# Valor de cada momento en una celda sin datos
+_VACIOS = {"n": 0.0, "media": 0.0, "M2": 0.0, "M3": 0.0, "M4": 0.0, "min": np.inf, "max": -np.inf}
+
+
+def _combinar(a, b):
+    # Fusión de Pébay de momentos centrales (hasta orden 4) de dos conjuntos disjuntos, celda a celda
+    na, nb = a["n"], b["n"]
+    n = na + nb
+    with np.errstate(invalid="ignore", divide="ignore"):
+        d = np.where(n > 0, b["media"] - a["media"], 0.0)
+        nab = np.where(n > 0, na * nb / np.where(n > 0, n, 1), 0.0)
+        fa = np.where(n > 0, na / np.where(n > 0, n, 1), 0.0)
+        fb = np.where(n > 0, nb / np.where(n > 0, n, 1), 0.0)
+    media = np.where(na > 0, a["media"], 0.0) + d * fb
+    M2 = a["M2"] + b["M2"] + d ** 2 * nab
+    M3 = a["M3"] + b["M3"] + d ** 3 * nab * (fa - fb) + 3 * d * (fa * b["M2"] - fb * a["M2"])
+    M4 = (a["M4"] + b["M4"] + d ** 4 * nab * (fa ** 2 - fa * fb + fb ** 2)
+          + 6 * d ** 2 * (fa ** 2 * b["M2"] + fb ** 2 * a["M2"]) + 4 * d * (fa * b["M3"] - fb * a["M3"]))
+    return {"n": n, "media": media, "M2": M2, "M3": M3, "M4": M4,
+            "min": np.fmin(a["min"], b["min"]), "max": np.fmax(a["max"], b["max"])}
+
+
+def _cuantiles_cubetas(cubetas, log_gamma, q):
+    # Recorre las cubetas de cada (estación, columna) en orden de valor hasta alcanzar el rango de cada cuantil
+    c = cubetas.reset_index(name="recuento")
+    gamma = np.exp(log_gamma)
+    c["valor"] = c["signo"] * 2 * gamma ** c["cubeta"].astype(float) / (gamma + 1)
+    c = c.sort_values(["estacion", "columna", "valor"], ignore_index=True)
+    acumulado = c.groupby(["estacion", "columna"])["recuento"].cumsum()
+    total = c.groupby(["estacion", "columna"])["recuento"].transform("sum")
+
+    resultado = {}
+    for p in q:
+        # Primera cubeta cuyo recuento acumulado supera el rango p·(n - 1), como en DDSketch
+        supera = acumulado > p * (total - 1)
+        resultado[f"{100 * p:g}%"] = c[supera].groupby(["estacion", "columna"])["valor"].first()
+    return pd.DataFrame(resultado)
+
+
+class Momentos:
+    """
+    Estadísticos descriptivos por estación en una sola pasada y fusionables entre trozos y procesos.
+
+    Sustituye las pasadas separadas de describe(), std() y kurtosis() sobre select_dtypes: cada trozo se resume en
+    recuento, media, momentos centrales M2-M4, mínimo y máximo por estación y columna, y los resúmenes se fusionan con
+    las fórmulas de Welford/Pébay, que son exactas (el resultado no depende del orden ni del tamaño de los trozos).
+    Los cuantiles se aproximan con un histograma de cubetas logarítmicas (como DDSketch) con error relativo acotado,
+    que también se fusiona sumando recuentos.
+
+    Parámetros
+
+    columnas: list, Columnas numéricas a resumir (por defecto las numéricas del primer trozo).
+    columna_estacion: str, Columna con el código de la estación.
+    error_relativo: float, Error relativo máximo de los cuantiles aproximados.
+    """
+
+    def __init__(self, columnas=None, columna_estacion="code", error_relativo=0.01):
+        self.columnas = None if columnas is None else list(columnas)
+        self.columna_estacion = columna_estacion
+        self.error_relativo = error_relativo
+        self._log_gamma = np.log((1 + error_relativo) / (1 - error_relativo))
+        self.momentos = None
+        self.cubetas = None
+
+    def _fusionar_momentos(self, otros):
+        # Alinea ambos resúmenes sobre la unión de estaciones y los fusiona
+        estaciones = self.momentos["n"].index.union(otros["n"].index)
+        propios = {k: self.momentos[k].reindex(estaciones, fill_value=_VACIOS[k]) for k in _MOMENTOS}
+        otros = {k: otros[k].reindex(estaciones, fill_value=_VACIOS[k]) for k in _MOMENTOS}
+        return {k: pd.DataFrame(np.asarray(v, dtype=float), index=estaciones, columns=self.columnas)
+                for k, v in _combinar(propios, otros).items()}
+
+    def actualizar(self, trozo):
+        """
+        Incorpora un trozo de datos (una o varias estaciones) al resumen.
+        """
+        if self.columnas is None:
+            self.columnas = list(trozo.select_dtypes(include=["number"]).columns)
+        valores = trozo[self.columnas].astype(float)
+        estaciones = trozo[self.columna_estacion].to_numpy()
+        grupos = valores.groupby(estaciones)
+
+        # Momentos del trozo: media por grupo y momentos centrales de las desviaciones, todo vectorizado
+        n = grupos.count().astype(float)
+        media = grupos.mean()
+        dev = valores - grupos.transform("mean")
+        nuevos = {"n": n, "media": media.fillna(0.0),
+                  "M2": (dev ** 2).groupby(estaciones).sum(), "M3": (dev ** 3).groupby(estaciones).sum(),
+                  "M4": (dev ** 4).groupby(estaciones).sum(),
+                  "min": grupos.min().fillna(np.inf), "max": grupos.max().fillna(-np.inf)}
+
+        self.momentos = nuevos if self.momentos is None else self._fusionar_momentos(nuevos)
+
+        # Histograma logarítmico para los cuantiles
+        x = valores.to_numpy()
+        filas, cols = np.nonzero(~np.isnan(x))
+        v = x[filas, cols]
+        signo = np.sign(v).astype(np.int8)
+        with np.errstate(divide="ignore"):
+            k = np.where(signo != 0, np.ceil(np.log(np.abs(v)) / self._log_gamma), 0).astype(np.int64)
+        # Recuento con np.unique sobre una clave entera (estación, columna, signo, cubeta) empaquetada
+        cod_est, est_unicas = pd.factorize(estaciones[filas])
+        k_min = k.min() if len(k) else 0
+        ancho_k = k.max() - k_min + 1 if len(k) else 1
+        clave = ((cod_est * len(self.columnas) + cols) * 3 + signo + 1) * ancho_k + (k - k_min)
+        unicas, recuento = np.unique(clave, return_counts=True)
+        resto, cubeta = np.divmod(unicas, ancho_k)
+        resto, sig = np.divmod(resto, 3)
+        est, col = np.divmod(resto, len(self.columnas))
+        cubetas = pd.Series(recuento, index=pd.MultiIndex.from_arrays(
+            [est_unicas[est], np.asarray(self.columnas)[col], sig - 1, cubeta + k_min],
+            names=["estacion", "columna", "signo", "cubeta"]))
+        self.cubetas = cubetas if self.cubetas is None else self.cubetas.add(cubetas, fill_value=0)
+        return self
+
+    def fusionar(self, otro):
+        """
+        Fusiona el resumen de otro Momentos (p. ej. de otro proceso o de otro fichero) en este.
+        """
+        if otro.momentos is None:
+            return self
+        if self.momentos is None:
+            self.columnas, self.momentos, self.cubetas = otro.columnas, otro.momentos, otro.cubetas
+            return self
+        self.momentos = self._fusionar_momentos(otro.momentos)
+        self.cubetas = self.cubetas.add(otro.cubetas, fill_value=0)
+        return self
+
+    def cuantiles(self, q=(0.25, 0.5, 0.75)):
+        """
+        Cuantiles aproximados por estación y columna (error relativo menor que error_relativo).
+
+        Devuelve
+
+        Data frame con índice (estacion, columna) y una columna por cuantil.
+        """
+        return _cuantiles_cubetas(self.cubetas, self._log_gamma, q)
+
+    def resumen(self, por_estacion=True):
+        """
+        Equivalente a describe() más skew() y kurtosis() con las convenciones de pandas (ddof=1 y estimadores
+        corregidos por sesgo).
+
+        Parámetros
+
+        por_estacion: bool, Si es False se fusionan todas las estaciones en un resumen de toda la red.
+
+        Devuelve
+
+        Data frame con índice (estacion, columna) (o columna si por_estacion=False) y columnas count, mean, std, min,
+        25%, 50%, 75%, max, skew y kurtosis.
+        """
+        m = self.momentos
+        cubetas = self.cubetas
+        if not por_estacion:
+            red = {k: m[k].iloc[[0]] for k in _MOMENTOS}
+            for i in range(1, len(m["n"])):
+                fila = {k: m[k].iloc[[i]].set_axis(red["n"].index) for k in _MOMENTOS}
+                red = {k: pd.DataFrame(np.asarray(v, dtype=float), index=red["n"].index, columns=self.columnas)
+                       for k, v in _combinar(red, fila).items()}
+            m = {k: v.set_axis(["red"]) for k, v in red.items()}
+            cubetas = self.cubetas.groupby(level=[1, 2, 3]).sum()
+            cubetas = pd.concat({"red": cubetas}, names=["estacion"])
+
+        n, M2, M3, M4 = (m[k].stack() for k in ("n", "M2", "M3", "M4"))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = M2 / (n - 1)
+            skew = np.sqrt(n * (n - 1)) / (n - 2) * np.sqrt(n) * M3 / M2 ** 1.5
+            kurt = (n * (n + 1) * (n - 1) * M4 / ((n - 2) * (n - 3) * M2 ** 2)
+                    - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3)))
+        tabla = pd.DataFrame({
+            "count": n,
+            "mean": m["media"].stack().where(n > 0),
+            "std": np.sqrt(var).where(n > 1),
+            "min": m["min"].stack().where(n > 0),
+            "max": m["max"].stack().where(n > 0),
+            "skew": skew.where(n > 2),
+            "kurtosis": kurt.where(n > 3),
+        })
+        tabla.index.names = ["estacion", "columna"]
+
+        tabla = tabla.join(_cuantiles_cubetas(cubetas, self._log_gamma, (0.25, 0.5, 0.75)))
+        tabla = tabla[["count", "mean", "std", "min", "25%", "50%", "75%", "max", "skew", "kurtosis"]]
+        return tabla.droplevel("estacion") if not por_estacion else tabla
+
+
+def momentos_por_trozos(fuente, columnas=None, columna_estacion="code", tam_trozo=50000, error_relativo=0.01):
+    """
+    Resume en una pasada un Data frame o un lector por trozos (pd.read_csv(..., chunksize=...)) sin cargarlo entero.
+
+    Parámetros
+
+    fuente: Data frame o iterable de Data frames.
+    columnas: list, Columnas numéricas a resumir.
+    columna_estacion: str, Columna con el código de la estación.
+    tam_trozo: int, Filas por trozo cuando fuente es un Data frame.
+    error_relativo: float, Error relativo de los cuantiles aproximados.
+
+    Devuelve
+
+    Momentos con el resumen (ver Momentos.resumen).
+    """
+    momentos = Momentos(columnas, columna_estacion, error_relativo)
+    for trozo in trozos(fuente, tam_trozo):
+        momentos.actualizar(trozo)
+    return momentos
@@ -0,0 +1,240 @@
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+# Umbrales de PM2.5 en µg/m³ citados en comentarios: media anual de la OMS y de la normativa europea y el nivel de
+# riesgo para la salud
+UMBRALES = {"oms_anual": 10.0, "ue_anual": 25.0, "riesgo": 35.0}
+
+
+def prob_normal(media, desviacion, umbral=UMBRALES["riesgo"]):
+    """
+    Probabilidad de superar el umbral con un pronóstico normal (p. ej. predicted_mean y se_mean de get_forecast de
+    SARIMA), para todas las estaciones y horizontes a la vez.
+
+    Parámetros
+
+    media, desviacion: array-like (estaciones, horizontes) o cualquier forma compatible.
+    umbral: float o array-like que se difunde con media (p. ej. umbral[..., None] para varios umbrales).
+
+    Devuelve
+
+    np.ndarray con P(Y > umbral).
+    """
+    media = np.asarray(media, dtype=float)
+    desviacion = np.maximum(np.asarray(desviacion, dtype=float), 1e-12)
+    return norm.sf((np.asarray(umbral, dtype=float) - media) / desviacion)
+
+
+def prob_intervalo(inferior, superior, umbral=UMBRALES["riesgo"], alpha=0.05):
+    """
+    Probabilidad de superar el umbral a partir de intervalos de predicción (SARIMA con conf_int o los de
+    ConformalRodante), suponiendo una distribución normal centrada en el intervalo.
+
+    Parámetros
+
+    inferior, superior: array-like (estaciones, horizontes), Extremos del intervalo de cobertura 1 - alpha.
+    umbral: float o array-like.
+    alpha: float, 1 - cobertura del intervalo.
+
+    Devuelve
+
+    np.ndarray con P(Y > umbral) (NaN si el intervalo es infinito, p. ej. con pocos residuos de calibración).
+    """
+    inferior, superior = np.asarray(inferior, dtype=float), np.asarray(superior, dtype=float)
+    with np.errstate(invalid="ignore"):
+        media = (inferior + superior) / 2
+        desviacion = (superior - inferior) / (2 * norm.ppf(1 - alpha / 2))
+        return np.where(np.isfinite(desviacion), prob_normal(media, desviacion, umbral), np.nan)
+
+
+def prob_muestras(muestras, umbral=UMBRALES["riesgo"], eje=0):
+    """
+    Probabilidad de superar el umbral como fracción de muestras por encima (LSTM con dropout en predicción, ensembles
+    o trayectorias simuladas de SARIMA).
+
+    Parámetros
+
+    muestras: array-like con las muestras a lo largo de 'eje', p. ej. (muestras, estaciones, horizontes).
+    umbral: float o array-like que se difunde con una muestra.
+    eje: int, Eje de las muestras.
+
+    Devuelve
+
+    np.ndarray con P(Y > umbral) (NaN donde no hay muestras válidas).
+    """
+    muestras = np.moveaxis(np.asarray(muestras, dtype=float), eje, 0)
+    validas = ~np.isnan(muestras)
+    with np.errstate(invalid="ignore"):
+        return (muestras > np.asarray(umbral, dtype=float)).sum(axis=0) / validas.sum(axis=0)
+
+
+def prob_conformal(conformal, y_pred, umbral=UMBRALES["riesgo"]):
+    """
+    Probabilidad de superar el umbral con los residuos de calibración de un ConformalRodante.
+
+    P(Y > u) = P(r > u - ŷ) se cuenta sobre el buffer ordenado de cada estación y horizonte con la corrección
+    conforme (k + 1) / (n + 1) acotada a 1. Con residuos absolutos (simetrico=True) se supone la distribución
+    simétrica y se usa la mitad de la cola.
+
+    Parámetros
+
+    conformal: ConformalRodante ya calibrado.
+    y_pred: array-like o Data frame (estaciones, horizontes), Pronósticos puntuales.
+    umbral: float o array-like (estaciones, horizontes).
+
+    Devuelve
+
+    np.ndarray (estaciones, horizontes) con P(Y > umbral) (NaN sin residuos de calibración).
+    """
+    distancia = np.broadcast_to(np.asarray(umbral, dtype=float) - conformal._a_array(y_pred), conformal.n.shape)
+    n = conformal.n
+    if conformal.simetrico:
+        # Cola de |r| más allá de |u - ŷ|: la mitad está del lado del umbral
+        cola = n - (conformal.ordenados <= np.abs(distancia)[..., None]).sum(axis=2)
+        mitad = np.minimum((cola + 1) / (n + 1), 1) / 2
+        p = np.where(distancia >= 0, mitad, 1 - mitad)
+    else:
+        cola = n - (conformal.ordenados <= distancia[..., None]).sum(axis=2)
+        p = np.minimum((cola + 1) / (n + 1), 1)
+    return np.where(n > 0, p, np.nan)
+
+
+def prob_alguna(prob, eje=-1):
+    """
+    Probabilidad de superar el umbral en al menos uno de los horizontes (p. ej. las próximas 24-72 h).
+
+    Se suponen los horizontes independientes, 1 - ∏(1 - p); como los errores de horizontes vecinos están
+    correlacionados es una cota superior, y el máximo de p una cota inferior.
+
+    Parámetros
+
+    prob: np.ndarray (estaciones, horizontes) con P(Y > umbral) por horizonte.
+    eje: int, Eje de los horizontes.
+
+    Devuelve
+
+    np.ndarray (estaciones,).
+    """
+    return 1 - np.prod(1 - np.nan_to_num(np.asarray(prob, dtype=float)), axis=eje)
+
+
+def alertas(prob, estaciones, prob_min=0.5, horizontes=None):
+    """
+    Tabla de alertas: estaciones y horizontes con probabilidad de superación de al menos prob_min.
+
+    Parámetros
+
+    prob: np.ndarray (estaciones, horizontes).
+    estaciones: list, Código de cada fila.
+    prob_min: float, Probabilidad a partir de la cual se emite la alerta.
+    horizontes: list, Etiqueta de cada columna (por defecto 1..H).
+
+    Devuelve
+
+    df con estacion, horizonte y probabilidad, ordenado de mayor a menor probabilidad.
+    """
+    prob = np.asarray(prob, dtype=float)
+    horizontes = np.arange(1, prob.shape[1] + 1) if horizontes is None else np.asarray(horizontes)
+    filas, cols = np.nonzero(prob >= prob_min)
+    tabla = pd.DataFrame({"estacion": np.asarray(estaciones)[filas], "horizonte": horizontes[cols],
+                          "probabilidad": prob[filas, cols]})
+    return tabla.sort_values("probabilidad", ascending=False, ignore_index=True)
+
+
+class MediaAnualMovil:
+    """
+    Media móvil anual de todas las estaciones actualizada hora a hora, para vigilar el cumplimiento de los límites
+    anuales (10 µg/m³ de la OMS y 25 µg/m³ de la normativa europea).
+
+    Las últimas 'ventana' horas se guardan en un buffer circular (ventana, estaciones) junto con la suma y el recuento
+    de valores válidos de cada estación: cada bloque de horas nuevas resta las que salen de la ventana y suma las que
+    entran, sin recorrer el año entero. Cada vez que el buffer da una vuelta completa se recalculan las sumas desde cero
+    para que no se acumule error de redondeo.
+
+    Parámetros
+
+    estaciones: list, Códigos de estación (columnas).
+    ventana: int, Horas de la ventana (8760 = un año).
+    umbrales: dict {nombre: valor} de límites anuales.
+    cobertura_min: float, Fracción mínima de horas con dato para evaluar el cumplimiento (si no, NaN).
+    """
+
+    def __init__(self, estaciones, ventana=8760, umbrales=None, cobertura_min=0.75):
+        self.estaciones = list(estaciones)
+        self.ventana = ventana
+        self.umbrales = {"oms_anual": UMBRALES["oms_anual"], "ue_anual": UMBRALES["ue_anual"]} \
+            if umbrales is None else dict(umbrales)
+        self.cobertura_min = cobertura_min
+        self.buffer = np.full((ventana, len(self.estaciones)), np.nan)
+        self.ptr = 0
+        self.suma = np.zeros(len(self.estaciones))
+        self.recuento = np.zeros(len(self.estaciones), dtype=int)
+
+    @classmethod
+    def desde_df(cls, df, columna="PM2.5", columna_estacion="code", **kwargs):
+        """
+        Inicializa con el histórico de un Data frame largo indexado por fecha (las últimas 'ventana' horas).
+        """
+        ancho = df.pivot_table(index=df.index, columns=columna_estacion, values=columna).asfreq("h")
+        movil = cls(ancho.columns, **kwargs)
+        return movil.actualizar(ancho)
+
+    def actualizar(self, valores):
+        """
+        Añade una o varias horas nuevas.
+
+        Parámetros
+
+        valores: array-like (estaciones,) o (horas, estaciones), o Data frame horario con las estaciones en columnas.
+        """
+        if isinstance(valores, pd.DataFrame):
+            valores = valores.reindex(columns=self.estaciones)
+        valores = np.asarray(valores, dtype=float).reshape(-1, len(self.estaciones))
+        if len(valores) >= self.ventana:
+            self.buffer[:] = valores[-self.ventana:]
+            self.ptr = 0
+            self._recalcular()
+            return self
+
+        posiciones = (self.ptr + np.arange(len(valores))) % self.ventana
+        salientes = self.buffer[posiciones]
+        self.suma += np.nansum(valores, axis=0) - np.nansum(salientes, axis=0)
+        self.recuento += (~np.isnan(valores)).sum(axis=0) - (~np.isnan(salientes)).sum(axis=0)
+        self.buffer[posiciones] = valores
+        vuelta = self.ptr + len(valores) >= self.ventana
+        self.ptr = (self.ptr + len(valores)) % self.ventana
+        if vuelta:
+            self._recalcular()
+        return self
+
+    def _recalcular(self):
+        # Sumas exactas desde el buffer (elimina el error acumulado de las restas)
+        self.suma = np.nansum(self.buffer, axis=0)
+        self.recuento = (~np.isnan(self.buffer)).sum(axis=0)
+
+    def media(self):
+        """
+        Media de la ventana por estación (NaN si no hay datos).
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.Series(np.where(self.recuento > 0, self.suma / self.recuento, np.nan), index=self.estaciones)
+
+    def cumplimiento(self):
+        """
+        Estado de cumplimiento de los límites anuales de todas las estaciones.
+
+        Devuelve
+
+        df indexado por estación con media, cobertura, un booleano 'cumple_<umbral>' por umbral (NaN si la cobertura
+        es menor que cobertura_min) y el margen hasta cada límite.
+        """
+        media = self.media()
+        cobertura = pd.Series(self.recuento / self.ventana, index=self.estaciones)
+        tabla = pd.DataFrame({"media": media, "cobertura": cobertura})
+        evaluable = cobertura >= self.cobertura_min
+        for nombre, valor in self.umbrales.items():
+            tabla[f"cumple_{nombre}"] = (media <= valor).astype(object).where(evaluable)
+            tabla[f"margen_{nombre}"] = valor - media
+        return tabla
@@ -0,0 +1,44 @@
+"""
+Funciones auxiliares de los notebooks, con carga perezosa.
+
+Importar el paquete no carga pandas, statsmodels ni los textos de comentarios: cada submódulo se importa la primera
+vez que se pide una de sus funciones (``from funciones_auxiliares import cambio_temp`` o
+``funciones_auxiliares.obtener_q_optimo``), de modo que los procesos de un pool que solo necesitan una función
+arrancan en milisegundos. El tiempo de importación se mide con ``python -m funciones_auxiliares._benchmark``.
+"""
+
+import importlib
+
+# Función -> submódulo que la define
+_SUBMODULOS = {
+    "contar_outliers_iqr": "preprocesado",
+    "seleccionar_sede": "preprocesado",
+    "cambio_temp": "preprocesado",
+    "obtener_q_optimo": "identificacion",
+    "obtener_p_optimo": "identificacion",
+    "comentarios": "comentarios",
+    "registro": "instrumentacion",
+    "activar": "instrumentacion",
+    "instrumentado": "instrumentacion",
+    "medir": "instrumentacion",
+    "modo_silencioso": "instrumentacion",
+    "silencio": "instrumentacion",
+}
+
+__all__ = list(_SUBMODULOS)
+
+
+def __getattr__(nombre):
+    if nombre in _SUBMODULOS:
+        valor = getattr(importlib.import_module(f".{_SUBMODULOS[nombre]}", __name__), nombre)
+    elif nombre in set(_SUBMODULOS.values()):
+        valor = importlib.import_module(f".{nombre}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    # Se guarda en el paquete para que los siguientes accesos no pasen por __getattr__
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,42 @@
+"""
+Mide el tiempo de importación del paquete en procesos nuevos (como los de un pool).
+
+Uso: python -m funciones_auxiliares._benchmark [repeticiones]
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+
+# Sentencia -> qué mide
+_CASOS = {
+    "import funciones_auxiliares": "solo el paquete",
+    "from funciones_auxiliares import cambio_temp": "preprocesado (pandas)",
+    "from funciones_auxiliares import obtener_q_optimo": "identificacion (statsmodels)",
+    "from funciones_auxiliares import comentarios": "comentarios (textos)",
+}
+
+
+def medir(sentencia, repeticiones=5):
+    """
+    Mediana en milisegundos de arrancar un intérprete, ejecutar la sentencia y salir, descontando el arranque vacío.
+    """
+    def arranque(codigo):
+        tiempos = []
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, "-c", codigo], check=True)
+            tiempos.append(time.perf_counter() - t0)
+        return statistics.median(tiempos)
+
+    return 1000 * (arranque(sentencia) - arranque("pass"))
+
+
+def main(repeticiones=5):
+    for sentencia, descripcion in _CASOS.items():
+        print(f"{medir(sentencia, repeticiones):9.1f} ms  {descripcion:30s} {sentencia}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -1,144 +1,5 @@
 
-import pandas as pd
-from statsmodels.tsa.stattools import acf, pacf
-import numpy as np
-
-def contar_outliers_iqr(df):
-    """
-    Métrica usada en cada columna numérica para ver si es outliers: Q1 - 1.5*IQR y Q3 + 1.5*IQR.
-    
-    Devuelve un df con el número de outliers por columna.
-    """
-    outliers_count = {}
-    
-    for col in df.select_dtypes(include=['number']).columns:
-        Q1 = df[col].quantile(0.25)
-        Q3 = df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-        
-        # Conteo de outliers
-        outliers = ((df[col] < lower_bound) | (df[col] > upper_bound)).sum()
-        outliers_count[col] = outliers
-    
-    return pd.Series(outliers_count)
-
-
-def seleccionar_sede(df,palabra = "so"):
-
-    """
-    Selecciona los datos de la sede para el estudio 
-
-    Parámetros 
-
-    Palabra: str, Codigo de la estacion que se quiere ver, se inicializa por si no se sabe los codigo
-    
-    Devuelve
-    
-    df cuyas observaciones coincidan con el code seleccionado.
-    """
-    lista = set(df["code"])
-    lista.discard("IT0463A")   # No lanza error si no existe
-
-    while palabra not in lista:
-        print(lista)
-        palabra = input("Selecciones el código de la base que quiera revisar los datos")
-        
-    print("La base elegida es:", palabra)
-    return df[df['code'] == palabra]
-    
-
-def cambio_temp(df,columna):
-    """  
-    Cambia de farengeit a celsius  
-    Parámetros
-
-    df: Data frame
-    columna: str, Nombre de la columna sobre la que hacer el cambio de unidades
-
-    Devuelve 
-
-    df:  Data frame, cuya columna se ha convertido de farengeit a celsius.
-    """
-    df[columna]=(df[columna]-32)*5/9
-    print(f"La variable {columna} se ha convertido existosamente")
-    return df
-
-def obtener_q_optimo(serie, nlags=20, alpha=0.05):
-    """
-    Calcula el valor óptimo de q (número de rezagos para MA) 
-    a partir de la ACF de una serie temporal.
-
-    Parámetros
-    
-    serie : Serie temporal estacionaria.
-    nlags : int, Número máximo de rezagos a considerar.
-    alpha : float, Nivel de significancia para el intervalo de confianza.
-
-    Devuelve 
-
-    q_optimo : int, Último lag significativo (valor de q sugerido).
-    """
-
-    # Calculamos ACF y límites de confianza
-    acf_vals, confint = acf(serie, nlags=nlags, alpha=alpha)
-
-    # Extraemos límites superior e inferior
-    lower, upper = confint[:, 0], confint[:, 1]
-
-    # Detectamos los lags significativos
-    significativos = [i for i in range(1, nlags+1) if (acf_vals[i] < lower[i]) or (acf_vals[i] > upper[i])]
-
-    # Si no hay lags significativos, devolvemos 0
-    if not significativos:
-        print(f"El valor estimado de q (MA) es: {0} ya que no se ha llegado a lags significativos en {nlags} lags")
-        return 0
-
-    # El q óptimo es el último lag significativo
-    q_optimo = significativos[-1]
-
-    print(f"El valor estimado de q (MA) es: {q_optimo}")
-
-    return q_optimo
-
-def obtener_p_optimo(serie, nlags=20, alpha=0.05):
-    """
-    Calcula el valor óptimo de p (orden AR) usando la PACF.
-    
-    Parámetros
-
-    serie : Serie temporal estacionaria.
-    nlags : int, número máximo de rezagos a considerar (por defecto 20 valores).
-    alpha : float, nivel de significancia (por defecto 0.05 para 95% de confianza).
-    
-    Retorna
-   
-    p_optimo : int, último lag significativo fuera del intervalo de confianza.
-    """
-
-    # Calculamos ACF y límites de confianza
-    pacf_vals, confint = pacf(serie, nlags=nlags, alpha=alpha)
-
-    # Extraemos límites superior e inferior
-    lower, upper = confint[:, 0], confint[:, 1]
-
-    # Detectamos los lags significativos
-    significativos = [i for i in range(1, nlags+1) if (pacf_vals[i] < lower[i]) or (pacf_vals[i] > upper[i])]
-
-    
-    # Si no hay lags significativos, devolvemos 0
-    if not significativos:
-        print(f"El valor estimado de p (AR) es: {0} ya que no se ha llegado a lags significativos en {nlags} lags")
-        return 0
-
-    # El q óptimo es el último lag significativo 
-    p_optimo = significativos[-1]
-
-    print(f"El valor estimado de p (AR) es: {p_optimo}")
-    
-    return p_optimo
+from .instrumentacion import logger
 
 
 def comentarios(df):
@@ -1485,7 +1346,8 @@ def comentarios(df):
         Se obserban residuos pequeños de forma aleatoria reforzando la selección del modelo."""
         } 
     else:
-        print("El código de su instalación no está registrado")
+        logger.warning("El código de su instalación no está registrado")
+        return {}
 
     comentario["diario"] = """Después de cambiar de un muestreo horario a uno diario, la serie se vuelve más suave, lo que ayuda a reducir el ruido. La descomposición aditiva con un periodo de 4 que captura ciclos trimestrales.
 
@@ -1505,4 +1367,4 @@ def comentarios(df):
 
         Se obserban residuos pequeños de forma aleatoria reforzando la selección del modelo."""
 
-    return comentario
\ No newline at end of file
+    return comentario
\ No newline at end of file
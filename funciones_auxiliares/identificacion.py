@@ -0,0 +1,81 @@
+
+from statsmodels.tsa.stattools import acf, pacf
+
+from .instrumentacion import instrumentado, logger
+
+
+@instrumentado
+def obtener_q_optimo(serie, nlags=20, alpha=0.05):
+    """
+    Calcula el valor óptimo de q (número de rezagos para MA) 
+    a partir de la ACF de una serie temporal.
+
+    Parámetros
+    
+    serie : Serie temporal estacionaria.
+    nlags : int, Número máximo de rezagos a considerar.
+    alpha : float, Nivel de significancia para el intervalo de confianza.
+
+    Devuelve 
+
+    q_optimo : int, Último lag significativo (valor de q sugerido).
+    """
+
+    # Calculamos ACF y límites de confianza
+    acf_vals, confint = acf(serie, nlags=nlags, alpha=alpha)
+
+    # Extraemos límites superior e inferior
+    lower, upper = confint[:, 0], confint[:, 1]
+
+    # Detectamos los lags significativos
+    significativos = [i for i in range(1, nlags+1) if (acf_vals[i] < lower[i]) or (acf_vals[i] > upper[i])]
+
+    # Si no hay lags significativos, devolvemos 0
+    if not significativos:
+        logger.info("El valor estimado de q (MA) es: 0 ya que no se ha llegado a lags significativos en %d lags", nlags)
+        return 0
+
+    # El q óptimo es el último lag significativo
+    q_optimo = significativos[-1]
+
+    logger.info("El valor estimado de q (MA) es: %d", q_optimo)
+
+    return q_optimo
+
+@instrumentado
+def obtener_p_optimo(serie, nlags=20, alpha=0.05):
+    """
+    Calcula el valor óptimo de p (orden AR) usando la PACF.
+    
+    Parámetros
+
+    serie : Serie temporal estacionaria.
+    nlags : int, número máximo de rezagos a considerar (por defecto 20 valores).
+    alpha : float, nivel de significancia (por defecto 0.05 para 95% de confianza).
+    
+    Retorna
+   
+    p_optimo : int, último lag significativo fuera del intervalo de confianza.
+    """
+
+    # Calculamos ACF y límites de confianza
+    pacf_vals, confint = pacf(serie, nlags=nlags, alpha=alpha)
+
+    # Extraemos límites superior e inferior
+    lower, upper = confint[:, 0], confint[:, 1]
+
+    # Detectamos los lags significativos
+    significativos = [i for i in range(1, nlags+1) if (pacf_vals[i] < lower[i]) or (pacf_vals[i] > upper[i])]
+
+    
+    # Si no hay lags significativos, devolvemos 0
+    if not significativos:
+        logger.info("El valor estimado de p (AR) es: 0 ya que no se ha llegado a lags significativos en %d lags", nlags)
+        return 0
+
+    # El q óptimo es el último lag significativo 
+    p_optimo = significativos[-1]
+
+    logger.info("El valor estimado de p (AR) es: %d", p_optimo)
+    
+    return p_optimo
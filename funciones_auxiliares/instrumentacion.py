@@ -0,0 +1,152 @@
+"""
+Instrumentación de las funciones auxiliares: llamadas, tiempo y bytes procesados en un registro en memoria, y logging
+con niveles en lugar de print.
+
+Las métricas están desactivadas por defecto (o activadas con la variable de entorno FUNCIONES_AUXILIARES_METRICAS=1)
+y, mientras lo están, el decorador solo añade una comprobación de un booleano por llamada. Los mensajes de las
+funciones se siguen viendo en el notebook (nivel INFO por la salida estándar) salvo en modo silencioso.
+"""
+
+import contextlib
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger("funciones_auxiliares")
+if not logger.handlers:
+    _manejador = logging.StreamHandler(sys.stdout)
+    _manejador.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_manejador)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_ACTIVO = os.environ.get("FUNCIONES_AUXILIARES_METRICAS", "0") not in ("", "0")
+
+
+def _tamano(obj):
+    # Bytes de un array, Serie o Data frame (0 si no se sabe medir)
+    n = getattr(obj, "nbytes", None)
+    if n is None and hasattr(obj, "memory_usage"):
+        n = obj.memory_usage(index=False)
+        n = n.sum() if hasattr(n, "sum") else n
+    return int(n or 0)
+
+
+class Registro:
+    """
+    Contadores por función: número de llamadas, segundos de reloj y bytes procesados.
+    """
+
+    def __init__(self):
+        self._metricas = {}
+        self._cerrojo = threading.Lock()
+
+    def registrar(self, nombre, segundos, n_bytes=0):
+        with self._cerrojo:
+            m = self._metricas.setdefault(nombre, [0, 0.0, 0])
+            m[0] += 1
+            m[1] += segundos
+            m[2] += n_bytes
+
+    def reiniciar(self):
+        with self._cerrojo:
+            self._metricas.clear()
+
+    def a_dict(self):
+        """
+        Diccionario {función: {llamadas, segundos, bytes}}.
+        """
+        with self._cerrojo:
+            return {nombre: {"llamadas": m[0], "segundos": m[1], "bytes": m[2]}
+                    for nombre, m in sorted(self._metricas.items())}
+
+    def a_json(self, **kwargs):
+        return json.dumps(self.a_dict(), **kwargs)
+
+    def a_prometheus(self, prefijo="funciones_auxiliares"):
+        """
+        Métricas en el formato de texto de exposición de Prometheus (contadores con la etiqueta funcion).
+        """
+        metricas = self.a_dict()
+        lineas = []
+        for clave, sufijo, ayuda in (("llamadas", "llamadas_total", "Número de llamadas"),
+                                     ("segundos", "segundos_total", "Tiempo de reloj acumulado en segundos"),
+                                     ("bytes", "bytes_total", "Bytes de entrada procesados")):
+            lineas.append(f"# HELP {prefijo}_{sufijo} {ayuda}")
+            lineas.append(f"# TYPE {prefijo}_{sufijo} counter")
+            for nombre, m in metricas.items():
+                lineas.append(f'{prefijo}_{sufijo}{{funcion="{nombre}"}} {m[clave]}')
+        return "\n".join(lineas) + "\n"
+
+
+registro = Registro()
+
+
+def activar(activo=True):
+    """
+    Activa o desactiva la recogida de métricas.
+    """
+    global _ACTIVO
+    _ACTIVO = activo
+
+
+def instrumentado(func=None, nombre=None):
+    """
+    Decorador que registra llamadas, tiempo y bytes del primer argumento (el df o la serie) de la función.
+
+    Se usa como @instrumentado o @instrumentado(nombre="...").
+    """
+    if func is None:
+        return functools.partial(instrumentado, nombre=nombre)
+    etiqueta = nombre or func.__name__
+
+    @functools.wraps(func)
+    def envoltura(*args, **kwargs):
+        if not _ACTIVO:
+            return func(*args, **kwargs)
+        t0 = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            registro.registrar(etiqueta, time.perf_counter() - t0, _tamano(args[0]) if args else 0)
+
+    return envoltura
+
+
+@contextlib.contextmanager
+def medir(nombre, n_bytes=0):
+    """
+    Registra el tiempo de un bloque de código (p. ej. el bucle sobre estaciones de un notebook).
+    """
+    if not _ACTIVO:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        registro.registrar(nombre, time.perf_counter() - t0, n_bytes)
+
+
+def modo_silencioso(silencioso=True):
+    """
+    Oculta (o vuelve a mostrar) los mensajes informativos de las funciones; los avisos se siguen mostrando.
+    """
+    logger.setLevel(logging.WARNING if silencioso else logging.INFO)
+
+
+@contextlib.contextmanager
+def silencio():
+    """
+    Modo silencioso solo dentro del bloque with (p. ej. en un bucle sobre todas las estaciones).
+    """
+    nivel = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        logger.setLevel(nivel)
@@ -0,0 +1,71 @@
+
+import pandas as pd
+
+from .instrumentacion import instrumentado, logger
+
+
+@instrumentado
+def contar_outliers_iqr(df):
+    """
+    Métrica usada en cada columna numérica para ver si es outliers: Q1 - 1.5*IQR y Q3 + 1.5*IQR.
+    
+    Devuelve un df con el número de outliers por columna.
+    """
+    outliers_count = {}
+    
+    for col in df.select_dtypes(include=['number']).columns:
+        Q1 = df[col].quantile(0.25)
+        Q3 = df[col].quantile(0.75)
+        IQR = Q3 - Q1
+        
+        lower_bound = Q1 - 1.5 * IQR
+        upper_bound = Q3 + 1.5 * IQR
+        
+        # Conteo de outliers
+        outliers = ((df[col] < lower_bound) | (df[col] > upper_bound)).sum()
+        outliers_count[col] = outliers
+    
+    return pd.Series(outliers_count)
+
+
+@instrumentado
+def seleccionar_sede(df,palabra = "so"):
+
+    """
+    Selecciona los datos de la sede para el estudio 
+
+    Parámetros 
+
+    Palabra: str, Codigo de la estacion que se quiere ver, se inicializa por si no se sabe los codigo
+    
+    Devuelve
+    
+    df cuyas observaciones coincidan con el code seleccionado.
+    """
+    lista = set(df["code"])
+    lista.discard("IT0463A")   # No lanza error si no existe
+
+    while palabra not in lista:
+        logger.warning("Códigos disponibles: %s", lista)
+        palabra = input("Selecciones el código de la base que quiera revisar los datos")
+        
+    logger.info("La base elegida es: %s", palabra)
+    return df[df['code'] == palabra]
+    
+
+@instrumentado
+def cambio_temp(df,columna):
+    """  
+    Cambia de farengeit a celsius  
+    Parámetros
+
+    df: Data frame
+    columna: str, Nombre de la columna sobre la que hacer el cambio de unidades
+
+    Devuelve 
+
+    df:  Data frame, cuya columna se ha convertido de farengeit a celsius.
+    """
+    df[columna]=(df[columna]-32)*5/9
+    logger.info("La variable %s se ha convertido existosamente", columna)
+    return df
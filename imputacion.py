@@ -0,0 +1,205 @@
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+
+# Códigos de la máscara de imputación
+OBSERVADO, INTERPOLADO, ESTACIONAL, KALMAN, SIN_RELLENAR = 0, 1, 2, 3, -1
+
+
+def rachas(mascara):
+    """
+    Rachas de True de cada columna de una máscara booleana con codificación por longitud de rachas.
+
+    Parámetros
+
+    mascara: np.ndarray booleano (tiempo, columnas).
+
+    Devuelve
+
+    col, ini, fin: np.ndarray con la columna, el inicio y el fin (exclusivo) de cada racha, ordenadas por columna.
+    """
+    relleno = np.zeros((1, mascara.shape[1]), dtype=bool)
+    cambios = np.diff(np.vstack([relleno, mascara, relleno]).astype(np.int8), axis=0)
+    # Se recorre la traspuesta para que las rachas salgan ordenadas por columna y emparejadas inicio-fin
+    col, ini = np.nonzero(cambios.T == 1)
+    _, fin = np.nonzero(cambios.T == -1)
+    return col, ini, fin
+
+
+def posiciones_rachas(ini, fin):
+    """
+    Expande las rachas a sus posiciones sin bucles.
+
+    Devuelve
+
+    ids: np.ndarray con el número de racha de cada posición.
+    filas: np.ndarray con la fila de cada posición (la columna es col[ids]).
+    """
+    largos = fin - ini
+    ids = np.repeat(np.arange(len(ini)), largos)
+    filas = ini[ids] + np.arange(largos.sum()) - np.repeat(np.cumsum(largos) - largos, largos)
+    return ids, filas
+
+
+def _rachas_nan(valores):
+    # Inicio y fin (exclusivo) de las rachas de NaN de cada columna
+    return rachas(np.isnan(valores))
+
+
+def _largo_hueco(forma, col, ini, fin):
+    # Longitud del hueco al que pertenece cada celda (0 en las observadas)
+    largo = np.zeros(forma, dtype=int)
+    ids, filas = posiciones_rachas(ini, fin)
+    largo[filas, col[ids]] = (fin - ini)[ids]
+    return largo
+
+
+def rejilla_horaria(grupo, columnas):
+    """
+    Lleva las columnas de una estación a una rejilla horaria regular (las horas que faltan quedan como NaN).
+
+    Parámetros
+
+    grupo: Data frame de una estación indexado por fecha.
+    columnas: list, Columnas numéricas a conservar.
+
+    Devuelve
+
+    Data frame con frecuencia horaria.
+    """
+    grupo = grupo[columnas].sort_index()
+    return grupo[~grupo.index.duplicated()].asfreq("h")
+
+
+def huecos(df, columnas=None, columna_estacion="code"):
+    """
+    Tabla de huecos (rachas de horas sin dato) por estación y columna.
+
+    Parámetros
+
+    df: Data frame largo indexado por fecha con la columna de estación.
+    columnas: list, Columnas a revisar (por defecto todas las numéricas).
+    columna_estacion: str, Columna con el código de la estación.
+
+    Devuelve
+
+    Data frame con estacion, columna, inicio, fin y duracion (horas) de cada hueco.
+    """
+    columnas = list(df.select_dtypes(include=["number"]).columns if columnas is None else columnas)
+    tablas = []
+    for codigo, grupo in df.groupby(columna_estacion):
+        rejilla = rejilla_horaria(grupo, columnas)
+        col, ini, fin = _rachas_nan(rejilla.to_numpy(dtype=float))
+        tablas.append(pd.DataFrame({
+            "estacion": codigo,
+            "columna": np.asarray(columnas)[col],
+            "inicio": rejilla.index[ini],
+            "fin": rejilla.index[fin - 1],
+            "duracion": fin - ini,
+        }))
+    return pd.concat(tablas, ignore_index=True)
+
+
+def _relleno_estacional(rejilla, periodo):
+    # Perfil medio de cada fase más el desvío respecto al perfil interpolado linealmente entre los bordes del hueco
+    horas = rejilla.index.as_unit("ns").asi8 // 3_600_000_000_000
+    fase = horas % periodo
+    perfil = rejilla.groupby(fase).transform("mean")
+    desvio = (rejilla - perfil).interpolate(method="linear", limit_direction="both")
+    return (perfil + desvio).to_numpy(dtype=float)
+
+
+def _relleno_kalman(serie, periodo, armonicos):
+    # Señal suavizada (nivel local + estacionalidad) del modelo de espacio de estados en los huecos
+    modelo = sm.tsa.UnobservedComponents(serie, level="local level",
+                                         freq_seasonal=[{"period": periodo, "harmonics": armonicos}])
+    ajuste = modelo.fit(disp=False)
+    return ajuste.smoother_results.smoothed_forecasts[0]
+
+
+def imputar_estacion(rejilla, max_corto=3, max_largo=24 * 7, metodo_largo="estacional", periodo=24,
+                     contexto=24 * 7, armonicos=3):
+    """
+    Rellena los huecos de una estación ya en rejilla horaria (ver imputar).
+
+    Devuelve
+
+    rellena: Data frame con los huecos rellenados.
+    mascara: Data frame int8 con el código de cada celda.
+    """
+    valores = rejilla.to_numpy(dtype=float)
+    col, ini, fin = _rachas_nan(valores)
+    largo = _largo_hueco(valores.shape, col, ini, fin)
+    mascara = np.where(largo > 0, SIN_RELLENAR, OBSERVADO).astype(np.int8)
+    rellena = valores.copy()
+
+    # Huecos cortos con ambos extremos observados: interpolación lineal
+    lineal = rejilla.interpolate(method="linear", limit_area="inside").to_numpy(dtype=float)
+    cortos = (largo > 0) & (largo <= max_corto) & ~np.isnan(lineal)
+    rellena[cortos] = lineal[cortos]
+    mascara[cortos] = INTERPOLADO
+
+    # Huecos largos (y cortos en los bordes): perfil estacional
+    largos = (largo > 0) & ~cortos & (largo <= max_largo)
+    if largos.any():
+        estacional = _relleno_estacional(rejilla, periodo)
+        rellena[largos] = estacional[largos]
+        mascara[largos] = ESTACIONAL
+
+    if metodo_largo == "kalman" and largos.any():
+        # Suavizado de Kalman en una ventana local alrededor de cada hueco largo: el coste no depende de la
+        # longitud total de la serie y con pocos datos de contexto se conserva el relleno estacional
+        tratar = (fin - ini > max_corto) & (fin - ini <= max_largo)
+        for c, a, b in zip(col[tratar], ini[tratar], fin[tratar]):
+            desde, hasta = max(0, a - contexto), min(len(valores), b + contexto)
+            ventana = valores[desde:hasta, c]
+            if np.sum(~np.isnan(ventana)) < 2 * periodo:
+                continue
+            rellena[a:b, c] = _relleno_kalman(ventana, periodo, armonicos)[a - desde:b - desde]
+            mascara[a:b, c] = KALMAN
+
+    return (pd.DataFrame(rellena, index=rejilla.index, columns=rejilla.columns),
+            pd.DataFrame(mascara, index=rejilla.index, columns=rejilla.columns))
+
+
+def imputar(df, columnas=None, max_corto=3, max_largo=24 * 7, metodo_largo="estacional", periodo=24,
+            contexto=24 * 7, armonicos=3, columna_estacion="code"):
+    """
+    Sustituye el dropna() previo a la modelización: rejilla horaria regular por estación con los huecos rellenados.
+
+    Los huecos de cada estación y columna se localizan a la vez con codificación por longitud de rachas. Los cortos
+    se interpolan linealmente; los largos se rellenan con el perfil estacional (media de cada hora del periodo más el
+    desvío interpolado entre los bordes) o con el suavizado de Kalman de un modelo de nivel local con estacionalidad,
+    ajustado solo en una ventana de 'contexto' horas a cada lado. Cada estación se procesa por separado, de modo que
+    la memoria necesaria es la de una estación y no la de toda la red.
+
+    Parámetros
+
+    df: Data frame largo indexado por fecha con la columna de estación.
+    columnas: list, Columnas a imputar (por defecto todas las numéricas).
+    max_corto: int, Horas máximas de un hueco que se interpola linealmente.
+    max_largo: int, Horas máximas de un hueco que se rellena; los más largos se dejan en NaN.
+    metodo_largo: str, "estacional" o "kalman".
+    periodo: int, Periodo estacional en horas (24 = ciclo diario, como s=24 en SARIMA).
+    contexto: int, Horas a cada lado del hueco usadas para ajustar el modelo de Kalman.
+    armonicos: int, Armónicos de la estacionalidad del modelo de Kalman.
+    columna_estacion: str, Columna con el código de la estación.
+
+    Devuelve
+
+    rellena: Data frame largo en rejilla horaria con la columna de estación y las columnas imputadas.
+    mascara: Data frame con la misma forma y el origen de cada valor (0 observado, 1 interpolado, 2 estacional,
+    3 Kalman, -1 sin rellenar).
+    """
+    if metodo_largo not in ("estacional", "kalman"):
+        raise ValueError("metodo_largo debe ser 'estacional' o 'kalman'")
+    columnas = list(df.select_dtypes(include=["number"]).columns if columnas is None else columnas)
+
+    rellenas, mascaras = [], []
+    for codigo, grupo in df.groupby(columna_estacion):
+        rellena, mascara = imputar_estacion(rejilla_horaria(grupo, columnas), max_corto, max_largo, metodo_largo,
+                                            periodo, contexto, armonicos)
+        rellenas.append(rellena.assign(**{columna_estacion: codigo}))
+        mascaras.append(mascara.assign(**{columna_estacion: codigo}))
+    return pd.concat(rellenas), pd.concat(mascaras)
@@ -0,0 +1,260 @@
+
+import base64
+import hashlib
+import html
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from periodos import periodo_dominante
+from utilidades import n_jobs_optimo
+
+# Secciones del informe de cada estación como en el notebook de EDA: (clave de comentarios, título, remuestreo, periodo)
+_SECCIONES = (
+    ("serie", "Serie horaria", None, None),
+    ("descomposicion", "Descomposición de la serie horaria", None, 365),
+    ("diario", "Descomposición de la serie diaria", "D", 7),
+    ("semanalmente", "Descomposición de la serie semanal", "W", 52),
+    ("mensual", "Descomposición de la serie mensual", "ME", 4),
+)
+# Cambiar si cambia el dibujo de las figuras, para no reutilizar las de la caché
+_VERSION_FIGURAS = "1"
+
+
+def reducir_minmax(y, n_puntos):
+    """
+    Índices que conservan el mínimo y el máximo de cada uno de n_puntos / 2 tramos de la serie (los picos no se pierden).
+
+    Parámetros
+
+    y: array-like 1D sin NaN.
+    n_puntos: int, Número aproximado de puntos a dibujar.
+
+    Devuelve
+
+    np.ndarray de posiciones ordenadas.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_puntos:
+        return np.arange(n)
+    tam = int(np.ceil(n / (n_puntos // 2)))
+    n_tramos = int(np.ceil(n / tam))
+    bloques = np.full(n_tramos * tam, np.nan)
+    bloques[:n] = y
+    bloques = bloques.reshape(n_tramos, tam)
+    base = np.arange(n_tramos) * tam
+    indices = np.concatenate([base + np.nanargmin(bloques, axis=1), base + np.nanargmax(bloques, axis=1)])
+    return np.unique(indices)
+
+
+def reducir_lttb(x, y, n_puntos):
+    """
+    Índices elegidos con Largest-Triangle-Three-Buckets: conserva la forma visual de la serie con n_puntos.
+
+    Parámetros
+
+    x: array-like 1D creciente (p. ej. fechas en nanosegundos).
+    y: array-like 1D sin NaN.
+    n_puntos: int, Número de puntos a dibujar.
+
+    Devuelve
+
+    np.ndarray de posiciones ordenadas.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_puntos or n_puntos < 3:
+        return np.arange(n)
+    bordes = np.floor(np.linspace(1, n - 1, n_puntos - 1)).astype(int)
+    elegidos = np.empty(n_puntos, dtype=int)
+    elegidos[0], elegidos[-1] = 0, n - 1
+    a = 0
+    for i in range(n_puntos - 2):
+        ini, fin = bordes[i], bordes[i + 1]
+        sig_fin = bordes[i + 2] if i + 2 < len(bordes) else n
+        media_x, media_y = x[fin:sig_fin].mean(), y[fin:sig_fin].mean()
+        # Área del triángulo formado con el punto anterior elegido y la media del tramo siguiente
+        area = np.abs((x[a] - media_x) * (y[ini:fin] - y[a]) - (x[a] - x[ini:fin]) * (media_y - y[a]))
+        a = ini + int(np.argmax(area))
+        elegidos[i + 1] = a
+    return elegidos
+
+
+def _reducir(serie, n_puntos, metodo):
+    serie = serie.dropna()
+    if metodo == "lttb":
+        indices = reducir_lttb(serie.index.asi8, serie.to_numpy(), n_puntos)
+    else:
+        indices = reducir_minmax(serie.to_numpy(), n_puntos)
+    return serie.index[indices], serie.to_numpy()[indices]
+
+
+def _png(figura):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    buffer = io.BytesIO()
+    FigureCanvasAgg(figura).print_png(buffer)
+    return buffer.getvalue()
+
+
+def _figura_serie(serie, titulo, n_puntos, metodo):
+    from matplotlib.figure import Figure
+
+    figura = Figure(figsize=(12, 5))
+    ax = figura.subplots()
+    ax.plot(*_reducir(serie, n_puntos, metodo), label=serie.name)
+    ax.set_title(titulo)
+    ax.set_xlabel("Fecha")
+    ax.legend()
+    figura.autofmt_xdate()
+    return _png(figura)
+
+
+def _figura_descomposicion(serie, periodo, n_puntos, metodo):
+    import statsmodels.api as sm
+    from matplotlib.figure import Figure
+
+    descomposicion = sm.tsa.seasonal_decompose(serie, model="additive", period=periodo)
+    figura = Figure(figsize=(12, 8))
+    ejes = figura.subplots(4, 1, sharex=True)
+    componentes = (descomposicion.observed, descomposicion.trend, descomposicion.seasonal, descomposicion.resid)
+    for ax, componente, nombre in zip(ejes, componentes, ("Observed", "Trend", "Seasonal", "Resid")):
+        fechas, valores = _reducir(componente, n_puntos, metodo)
+        if nombre == "Resid":
+            ax.plot(fechas, valores, marker="o", linestyle="none", markersize=2)
+            ax.axhline(0, color="k", linewidth=0.8)
+        else:
+            ax.plot(fechas, valores)
+        ax.set_ylabel(nombre)
+    figura.autofmt_xdate()
+    return _png(figura)
+
+
+def _huella_figura(serie, clave, periodo, n_puntos, metodo):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((_VERSION_FIGURAS, clave, periodo, n_puntos, metodo, serie.name)).encode())
+    h.update(serie.index.asi8.tobytes())
+    h.update(serie.to_numpy(dtype=float).tobytes())
+    return h.hexdigest()
+
+
+def _paginas_estacion(tarea):
+    # Figuras (desde la caché si ya existen) y comentarios de una estación; se ejecuta en un proceso del pool
+    from funciones_auxiliares import comentarios
+
+    codigo, serie, n_puntos, metodo, directorio_cache, periodos_auto = tarea
+    textos = comentarios(pd.DataFrame({"code": [codigo]}))
+    paginas = []
+    for clave, titulo, regla, periodo in _SECCIONES:
+        datos = serie.dropna() if regla is None else serie.resample(regla).mean().dropna()
+        if periodo is not None and periodos_auto:
+            detectado = periodo_dominante(datos)
+            if detectado is not None:
+                periodo = detectado
+                titulo = f"{titulo} (periodo detectado: {periodo})"
+            else:
+                titulo = f"{titulo} (sin periodo detectado, periodo {periodo})"
+        if periodo is not None and len(datos) < 2 * periodo:
+            paginas.append((titulo, None, f"No hay datos suficientes para dos ciclos completos (periodo {periodo})."))
+            continue
+
+        ruta = None
+        if directorio_cache is not None:
+            ruta = os.path.join(directorio_cache, _huella_figura(datos, clave, periodo, n_puntos, metodo) + ".png")
+        if ruta is not None and os.path.exists(ruta):
+            with open(ruta, "rb") as f:
+                png = f.read()
+        else:
+            if periodo is None:
+                png = _figura_serie(datos, f"{serie.name} en {codigo}", n_puntos, metodo)
+            else:
+                png = _figura_descomposicion(datos, periodo, n_puntos, metodo)
+            if ruta is not None:
+                with open(ruta, "wb") as f:
+                    f.write(png)
+        paginas.append((titulo, png, textos.get(clave, "")))
+    return codigo, paginas
+
+
+def _html(paginas_por_estacion, titulo):
+    partes = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+        f"<title>{html.escape(titulo)}</title>",
+        "<style>body{font-family:sans-serif;max-width:1100px;margin:auto}img{width:100%}"
+        "pre{white-space:pre-wrap;font-family:inherit}"
+        "@media print{section{page-break-after:always}}</style></head><body>",
+        f"<h1>{html.escape(titulo)}</h1><ul>",
+    ]
+    partes += [f"<li><a href='#{html.escape(str(c))}'>{html.escape(str(c))}</a></li>" for c, _ in paginas_por_estacion]
+    partes.append("</ul>")
+    for codigo, paginas in paginas_por_estacion:
+        partes.append(f"<section id='{html.escape(str(codigo))}'><h2>{html.escape(str(codigo))}</h2>")
+        for titulo_seccion, png, texto in paginas:
+            partes.append(f"<h3>{html.escape(titulo_seccion)}</h3>")
+            if png is not None:
+                partes.append(f"<img src='data:image/png;base64,{base64.b64encode(png).decode()}'>")
+            if texto:
+                partes.append(f"<pre>{html.escape(texto)}</pre>")
+        partes.append("</section>")
+    partes.append("</body></html>")
+    return "\n".join(partes)
+
+
+def generar_informe(df, ruta="informe.html", columna="PM2.5", columna_estacion="code", estaciones=None, n_puntos=2000,
+                    metodo="minmax", directorio_cache=None, n_jobs=None, titulo=None, periodos_auto=False):
+    """
+    Genera el informe de EDA de todas las estaciones (serie, descomposiciones horaria, diaria, semanal y mensual y los
+    textos de comentarios) en un único HTML estático.
+
+    Cada estación se dibuja en un proceso del pool con el backend Agg (sin pyplot ni ventanas). Las series largas se
+    reducen a unos n_puntos con min/max por tramo o LTTB antes de dibujar y, con directorio_cache, cada figura se guarda
+    con la huella de sus datos, de modo que al regenerar el informe solo se dibujan las estaciones que han cambiado. Para
+    obtener el PDF basta con imprimir el HTML (cada estación empieza en una página nueva).
+
+    Parámetros
+
+    df: Data frame largo indexado por fecha con la columna de estación.
+    ruta: str, Fichero HTML de salida.
+    columna: str, Variable del informe.
+    columna_estacion: str, Columna con el código de la estación.
+    estaciones: list, Estaciones a incluir (por defecto todas).
+    n_puntos: int, Puntos aproximados por línea dibujada.
+    metodo: str, "minmax" (conserva los picos) o "lttb".
+    directorio_cache: str, Carpeta de la caché de figuras (p. ej. ".cache_informe"); None (por defecto) para no usar
+    caché.
+    n_jobs: int, Procesos del pool (por defecto los núcleos disponibles).
+    titulo: str, Título del informe.
+    periodos_auto: bool, Si el periodo de cada descomposición se detecta con periodos.periodo_dominante en lugar de
+    usar los del notebook (365, 7, 52 y 4).
+
+    Devuelve
+
+    str con la ruta del informe.
+    """
+    if n_jobs is None:
+        n_jobs = n_jobs_optimo()
+    if directorio_cache is not None:
+        os.makedirs(directorio_cache, exist_ok=True)
+
+    tareas = []
+    for codigo, grupo in df.groupby(columna_estacion):
+        if estaciones is not None and codigo not in estaciones:
+            continue
+        serie = grupo[columna].sort_index()
+        tareas.append((codigo, serie[~serie.index.duplicated()], n_puntos, metodo, directorio_cache,
+                       periodos_auto))
+
+    if not tareas:
+        raise ValueError(f"Ninguna estación de {columna_estacion!r} coincide con las pedidas: {estaciones}")
+
+    with ProcessPoolExecutor(min(n_jobs, len(tareas))) as pool:
+        paginas = list(pool.map(_paginas_estacion, tareas))
+
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(_html(paginas, titulo or f"Informe de {columna} por estación"))
+    return ruta
@@ -0,0 +1,149 @@
+
+import numpy as np
+
+from ventanas_lstm import GeneradorVentanas
+
+
+def estadisticos_por_estacion(datos, fin_train):
+    """
+    Media y desviación de cada estación y variable en el tramo de entrenamiento, leyendo una estación cada vez (con un
+    memmap solo se carga en memoria una serie).
+
+    Parámetros
+
+    datos: np.ndarray o np.memmap (estaciones, tiempo, variables).
+    fin_train: int, Posición temporal donde termina el entrenamiento.
+
+    Devuelve
+
+    media, desv: np.ndarray (estaciones, 1, variables).
+    """
+    media = np.empty((datos.shape[0], 1, datos.shape[2]))
+    desv = np.empty_like(media)
+    for s in range(datos.shape[0]):
+        tramo = np.asarray(datos[s, :fin_train], dtype=float)
+        media[s, 0] = np.nanmean(tramo, axis=0)
+        desv[s, 0] = np.nanstd(tramo, axis=0)
+    desv[desv == 0] = 1.0
+    return media, desv
+
+
+def escalar_por_estacion(datos, fin_train):
+    """
+    Estandariza cada estación y variable con la media y desviación del tramo de entrenamiento.
+
+    Crea una copia escalada en memoria; para datos grandes o en memmap es mejor pasar media y desv de
+    estadisticos_por_estacion a GeneradorVentanas, que escala cada lote al copiarlo.
+
+    Parámetros
+
+    datos: np.ndarray (estaciones, tiempo, variables).
+    fin_train: int, Posición temporal donde termina el entrenamiento.
+
+    Devuelve
+
+    escalados: np.ndarray float32 con la misma forma.
+    media, desv: np.ndarray (estaciones, 1, variables) para deshacer el escalado.
+    """
+    media, desv = estadisticos_por_estacion(datos, fin_train)
+    return ((datos - media) / desv).astype(np.float32), media, desv
+
+
+def construir_lstm_global(n_estaciones, ventana, n_variables, horizonte=1, dim_embedding=4, unidades=64):
+    """
+    Crea una única LSTM para todas las estaciones con un embedding aprendido del código de estación.
+
+    El embedding se repite en cada paso de la ventana y se concatena a las variables, de modo que la red puede
+    ajustar el nivel y la dinámica propios de cada estación compartiendo el resto de pesos.
+
+    Parámetros
+
+    n_estaciones: int, Número de estaciones distintas.
+    ventana: int, Pasos de entrada.
+    n_variables: int, Variables por paso.
+    horizonte: int, Pasos a predecir.
+    dim_embedding: int, Dimensión del embedding de estación.
+    unidades: int, Unidades de la capa LSTM.
+
+    Devuelve
+
+    modelo: keras.Model compilado con entradas [serie, estacion].
+    """
+    from tensorflow.keras import Model
+    from tensorflow.keras.layers import LSTM, Concatenate, Dense, Embedding, Input, RepeatVector
+
+    serie = Input(shape=(ventana, n_variables), name="serie")
+    estacion = Input(shape=(), dtype="int32", name="estacion")
+
+    emb = Embedding(n_estaciones, dim_embedding, name="embedding_estacion")(estacion)
+    emb = RepeatVector(ventana)(emb)
+
+    x = Concatenate()([serie, emb])
+    x = LSTM(unidades)(x)
+    salida = Dense(horizonte)(x)
+
+    modelo = Model([serie, estacion], salida)
+    modelo.compile(optimizer="adam", loss="mse")
+    return modelo
+
+
+def entrenar_lstm_global(datos, ventana, horizonte=1, objetivo=0, train=0.8, epocas=10, tam_lote=512,
+                         dim_embedding=4, unidades=64):
+    """
+    Entrena la LSTM global con lotes que mezclan ventanas de todas las estaciones.
+
+    Parámetros
+
+    datos: np.ndarray, np.memmap o ruta a un .npy (estaciones, tiempo, variables) sin escalar; el escalado se aplica
+    a cada lote, sin copiar los datos.
+    ventana: int, Pasos de entrada.
+    horizonte: int, Pasos a predecir.
+    objetivo: int, Posición de la variable a predecir (p. ej. PM2.5).
+    train: float, Fracción temporal usada para entrenar; el resto es validación.
+    epocas: int, Número de épocas.
+    tam_lote: int, Tamaño del lote.
+    dim_embedding: int, Dimensión del embedding de estación.
+    unidades: int, Unidades de la capa LSTM.
+
+    Devuelve
+
+    dict con 'modelo', 'media', 'desv', 'objetivo', 'ventana' e 'historial'.
+    """
+    if isinstance(datos, str):
+        datos = np.load(datos, mmap_mode="r")
+    corte = int(datos.shape[1] * train)
+    media, desv = estadisticos_por_estacion(datos, corte)
+
+    gen_train = GeneradorVentanas(datos, ventana, horizonte, objetivo, tam_lote, barajar=True,
+                                  rango=(0, corte), con_serie=True, media=media, desv=desv)
+    gen_val = GeneradorVentanas(datos, ventana, horizonte, objetivo, tam_lote, barajar=False,
+                                rango=(corte - ventana, datos.shape[1]), con_serie=True, media=media, desv=desv)
+
+    modelo = construir_lstm_global(datos.shape[0], ventana, datos.shape[2], horizonte, dim_embedding, unidades)
+    historial = modelo.fit(gen_train.como_tf_dataset(), validation_data=gen_val.como_tf_dataset(),
+                           epochs=epocas, verbose=2)
+
+    return {"modelo": modelo, "media": media, "desv": desv, "objetivo": objetivo, "ventana": ventana,
+            "historial": historial.history}
+
+
+def predecir_lstm_global(ajuste, datos):
+    """
+    Predice todas las estaciones en una sola pasada hacia delante a partir de su última ventana.
+
+    Parámetros
+
+    ajuste: dict, Resultado de entrenar_lstm_global.
+    datos: np.ndarray (estaciones, tiempo, variables) sin escalar.
+
+    Devuelve
+
+    np.ndarray (estaciones, horizonte) en las unidades originales de la variable objetivo.
+    """
+    ventana, obj = ajuste["ventana"], ajuste["objetivo"]
+    media, desv = ajuste["media"], ajuste["desv"]
+
+    X = ((datos[:, -ventana:] - media) / desv).astype(np.float32)
+    estaciones = np.arange(datos.shape[0], dtype=np.int32)
+    pred = ajuste["modelo"].predict([X, estaciones], verbose=0)
+    return pred * desv[:, 0, obj, None] + media[:, 0, obj, None]
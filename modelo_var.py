@@ -0,0 +1,184 @@
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from funciones_auxiliares.instrumentacion import logger
+
+
+def panel_desde_df(df, variables, columna_estacion="code"):
+    """
+    Pasa el dataset en formato largo (una fila por estación y hora) a un panel 3D para ajustar el VAR de todas las estaciones a la vez.
+
+    Parámetros
+
+    df: Data frame indexado por fecha con la columna de la estación.
+    variables: list, Columnas que forman el vector del VAR (p. ej. ['PM2.5', 'PM10', 'O3', 'NO2']).
+    columna_estacion: str, Columna con el código de la estación.
+
+    Devuelve
+
+    Y: np.ndarray de forma (estaciones, tiempo, variables).
+    estaciones: list, Códigos de estación en el orden del primer eje.
+    indice: DatetimeIndex común (solo instantes con todas las estaciones y variables completas).
+    """
+    ancho = df.pivot_table(index=df.index, columns=columna_estacion, values=variables)
+    ancho = ancho.dropna()
+    estaciones = sorted(ancho.columns.get_level_values(1).unique())
+
+    # Se reordena a (estacion, tiempo, variable) en un único bloque contiguo
+    Y = np.stack([ancho.xs(e, axis=1, level=1)[variables].to_numpy(dtype=float) for e in estaciones])
+    return Y, estaciones, ancho.index
+
+
+def matriz_rezagos(Y, p):
+    """
+    Construye la matriz de rezagos como vista con strides (sin copiar los datos).
+
+    Parámetros
+
+    Y: np.ndarray (estaciones, tiempo, variables).
+    p: int, Orden máximo de rezago.
+
+    Devuelve
+
+    Z: vista de forma (estaciones, tiempo - p, variables, p + 1) donde Z[s, j, :, l] = y_{t-l} con t = j + p.
+    El rezago 0 es la variable respuesta y los rezagos 1..p los regresores.
+    """
+    ventanas = sliding_window_view(Y, p + 1, axis=1)
+    # Invertir el último eje sigue siendo una vista: la posición l pasa a ser el rezago l
+    return ventanas[..., ::-1]
+
+
+def gram_rezagos(Y, p_max):
+    """
+    Calcula de una sola vez los productos cruzados de [1, y_t, y_{t-1}, ..., y_{t-p_max}] para todas las estaciones.
+
+    Parámetros
+
+    Y: np.ndarray (estaciones, tiempo, variables).
+    p_max: int, Orden máximo de rezago.
+
+    Devuelve
+
+    M: np.ndarray (estaciones, d, d) con d = 1 + (p_max + 1) * variables. El orden de las columnas es
+    [constante, rezago 0, rezago 1, ..., rezago p_max] y dentro de cada rezago el de las variables.
+    n: int, Número de observaciones de la muestra común.
+    """
+    Z = matriz_rezagos(Y, p_max)
+    S, n, k, L = Z.shape
+    d = 1 + L * k
+
+    M = np.empty((S, d, d))
+    M[:, 0, 0] = n
+    sumas = Z.sum(axis=1).transpose(0, 2, 1).reshape(S, L * k)
+    M[:, 0, 1:] = sumas
+    M[:, 1:, 0] = sumas
+    M[:, 1:, 1:] = np.einsum("sjal,sjbm->slamb", Z, Z, optimize=True).reshape(S, L * k, L * k)
+    return M, n
+
+
+def _ols_desde_gram(M, n, p, k):
+    # Índices de la respuesta (rezago 0) y de los regresores (constante + rezagos 1..p)
+    resp = np.arange(1, 1 + k)
+    reg = np.r_[0, np.arange(1 + k, 1 + (p + 1) * k)]
+
+    XtX = M[:, reg[:, None], reg]
+    XtY = M[:, reg[:, None], resp]
+    YtY = M[:, resp[:, None], resp]
+
+    # Un único solve batched para todas las estaciones
+    B = np.linalg.solve(XtX, XtY)
+    ssr = YtY - np.einsum("sri,srj->sij", XtY, B)
+    return B, ssr / n
+
+
+def seleccionar_orden_var(Y, p_max=24):
+    """
+    Calcula AIC, BIC y HQIC para los órdenes 1..p_max en todas las estaciones reutilizando la Gram del orden máximo.
+
+    Todos los órdenes se comparan sobre la misma muestra (la del orden p_max), igual que hace statsmodels en select_order.
+
+    Parámetros
+
+    Y: np.ndarray (estaciones, tiempo, variables).
+    p_max: int, Orden máximo a evaluar.
+
+    Devuelve
+
+    df con índice (estacion, p) y columnas aic, bic y hqic.
+    """
+    S, _, k = Y.shape
+    M, n = gram_rezagos(Y, p_max)
+
+    filas = []
+    for p in range(1, p_max + 1):
+        _, sigma = _ols_desde_gram(M, n, p, k)
+        _, logdet = np.linalg.slogdet(sigma)
+        libres = p * k * k + k
+        filas.append(pd.DataFrame({
+            "estacion": np.arange(S),
+            "p": p,
+            "aic": logdet + 2 * libres / n,
+            "bic": logdet + np.log(n) * libres / n,
+            "hqic": logdet + 2 * np.log(np.log(n)) * libres / n,
+        }))
+    return pd.concat(filas).set_index(["estacion", "p"]).sort_index()
+
+
+def ajustar_var(Y, p=None, p_max=24, criterio="aic"):
+    """
+    Ajusta por MCO un VAR(p) con constante para todas las estaciones a la vez.
+
+    Parámetros
+
+    Y: np.ndarray (estaciones, tiempo, variables).
+    p: int, Orden del VAR. Si es None se elige el orden común que minimiza la media del criterio entre estaciones.
+    p_max: int, Orden máximo considerado en la selección.
+    criterio: str, 'aic', 'bic' o 'hqic'.
+
+    Devuelve
+
+    dict con 'coeficientes' (estaciones, 1 + p*variables, variables), 'sigma' (estaciones, variables, variables),
+    'p' y 'nobs'. La primera fila de los coeficientes es la constante y después van los rezagos 1..p.
+    """
+    k = Y.shape[2]
+    if p is None:
+        tabla = seleccionar_orden_var(Y, p_max)
+        p = int(tabla[criterio].groupby(level="p").mean().idxmin())
+        logger.debug("El orden común elegido por %s es p = %d", criterio.upper(), p)
+
+    M, n = gram_rezagos(Y, p)
+    B, sigma = _ols_desde_gram(M, n, p, k)
+    return {"coeficientes": B, "sigma": sigma, "p": p, "nobs": n}
+
+
+def pronosticar_var(ajuste, Y, pasos):
+    """
+    Pronostica de forma recursiva todas las estaciones a la vez.
+
+    Parámetros
+
+    ajuste: dict, Resultado de ajustar_var.
+    Y: np.ndarray (estaciones, tiempo, variables), Histórico del que se toman las últimas p observaciones.
+    pasos: int, Horizonte de predicción.
+
+    Devuelve
+
+    np.ndarray (estaciones, pasos, variables) con las predicciones.
+    """
+    B, p = ajuste["coeficientes"], ajuste["p"]
+    S, _, k = Y.shape
+
+    # Estado: [1, y_{t-1}, ..., y_{t-p}]
+    x = np.empty((S, 1 + p * k))
+    x[:, 0] = 1.0
+    x[:, 1:] = Y[:, -1:-p - 1:-1, :].reshape(S, p * k)
+
+    pred = np.empty((S, pasos, k))
+    for h in range(pasos):
+        y = np.einsum("sr,srk->sk", x, B)
+        pred[:, h] = y
+        x[:, 1 + k:] = x[:, 1:1 + (p - 1) * k].copy()
+        x[:, 1:1 + k] = y
+    return pred
@@ -0,0 +1,204 @@
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from utilidades import n_jobs_optimo
+
+# Caché de matrices binarizadas compartida por XGBoost y el bosque aleatorio
+_CACHE_MATRICES = OrderedDict()
+_MAX_CACHE = 8
+
+
+def preparar_matriz(X):
+    """
+    Convierte las variables explicativas en un bloque float32 contiguo (una sola copia que comparten todos los modelos).
+
+    Parámetros
+
+    X: Data frame o array 2D.
+
+    Devuelve
+
+    matriz: np.ndarray float32 C-contiguo.
+    nombres: list o None, Nombres de las columnas si X era un Data frame.
+    """
+    nombres = list(X.columns) if isinstance(X, pd.DataFrame) else None
+    return np.ascontiguousarray(np.asarray(X, dtype=np.float32)), nombres
+
+
+def _huella(*arrays):
+    h = hashlib.blake2b(digest_size=16)
+    for a in arrays:
+        if a is not None:
+            h.update(str(a.shape).encode())
+            h.update(memoryview(a))
+    return h.hexdigest()
+
+
+def matriz_cuantiles(X, y=None, max_bin=256, referencia=None):
+    """
+    Construye (o recupera de la caché) la QuantileDMatrix de XGBoost con las variables ya binarizadas.
+
+    Parámetros
+
+    X: Data frame o array 2D con las variables explicativas.
+    y: array-like, Variable respuesta.
+    max_bin: int, Número máximo de bins por variable.
+    referencia: QuantileDMatrix de entrenamiento cuyos cortes se reutilizan (obligatorio para validación/test).
+
+    Devuelve
+
+    xgb.QuantileDMatrix
+    """
+    matriz, nombres = preparar_matriz(X)
+    y = None if y is None else np.ascontiguousarray(np.asarray(y, dtype=np.float32))
+
+    # La referencia entra en la clave por la huella de su contenido (id() se reutiliza al liberar objetos); una
+    # referencia que no salió de esta caché no tiene huella y la matriz se construye sin cachear
+    huella_ref = None if referencia is None else getattr(referencia, "huella", None)
+    cacheable = referencia is None or huella_ref is not None
+    clave = (_huella(matriz, y), max_bin, huella_ref)
+    if cacheable and clave in _CACHE_MATRICES:
+        _CACHE_MATRICES.move_to_end(clave)
+        return _CACHE_MATRICES[clave]
+
+    dm = xgb.QuantileDMatrix(matriz, label=y, feature_names=nombres, max_bin=max_bin, ref=referencia,
+                             nthread=n_jobs_optimo())
+    if not cacheable:
+        return dm
+    dm.huella = _huella(matriz, y) + f"-{max_bin}-{huella_ref}"
+    _CACHE_MATRICES[clave] = dm
+    if len(_CACHE_MATRICES) > _MAX_CACHE:
+        _CACHE_MATRICES.popitem(last=False)
+    return dm
+
+
+def _particion_validacion(X_train, y_train, X_val, y_val, fraccion_val):
+    # Si no se da validación se reserva el último tramo temporal del entrenamiento
+    if X_val is not None or not fraccion_val:
+        return X_train, y_train, X_val, y_val
+    corte = int(len(X_train) * (1 - fraccion_val))
+    y_train = np.asarray(y_train)
+    if isinstance(X_train, pd.DataFrame):
+        return X_train.iloc[:corte], y_train[:corte], X_train.iloc[corte:], y_train[corte:]
+    X_train = np.asarray(X_train)
+    return X_train[:corte], y_train[:corte], X_train[corte:], y_train[corte:]
+
+
+def entrenar_xgb(X_train, y_train, X_val=None, y_val=None, fraccion_val=0.1, n_estimators=300,
+                 learning_rate=0.05, max_depth=6, subsample=0.8, colsample_bytree=0.8, paradas=30,
+                 max_bin=256, random_state=42):
+    """
+    Entrena XGBoost con histogramas sobre la matriz binarizada compartida y parada temprana en validación.
+
+    Parámetros
+
+    X_train, y_train: Datos de entrenamiento.
+    X_val, y_val: Datos de validación. Si son None se usa el último fraccion_val del entrenamiento.
+    fraccion_val: float, Fracción final del entrenamiento reservada para validar (0 desactiva la parada temprana).
+    n_estimators: int, Número máximo de árboles.
+    paradas: int, Rondas sin mejora en validación antes de parar.
+    resto: Hiperparámetros equivalentes a los de XGBRegressor.
+
+    Devuelve
+
+    booster: xgb.Booster entrenado (best_iteration indica el corte de la parada temprana).
+    """
+    X_train, y_train, X_val, y_val = _particion_validacion(X_train, y_train, X_val, y_val, fraccion_val)
+
+    dtrain = matriz_cuantiles(X_train, y_train, max_bin)
+    evals = []
+    if X_val is not None:
+        evals = [(matriz_cuantiles(X_val, y_val, max_bin, referencia=dtrain), "validacion")]
+
+    parametros = {
+        "objective": "reg:squarederror",
+        "tree_method": "hist",
+        "max_bin": max_bin,
+        "eta": learning_rate,
+        "max_depth": max_depth,
+        "subsample": subsample,
+        "colsample_bytree": colsample_bytree,
+        "nthread": n_jobs_optimo(),
+        "seed": random_state,
+    }
+    return xgb.train(parametros, dtrain, num_boost_round=n_estimators, evals=evals,
+                     early_stopping_rounds=paradas if evals else None, verbose_eval=False)
+
+
+def entrenar_rf_hist(X_train, y_train, X_val=None, y_val=None, fraccion_val=0.0, n_estimators=100, max_depth=12,
+                     subsample=0.8, colsample_bynode=0.8, max_bin=256, random_state=42):
+    """
+    Bosque aleatorio con histogramas (modo random forest de XGBoost) sobre la misma matriz binarizada que entrenar_xgb.
+
+    Sustituye a RandomForestRegressor, que no tiene modo histograma y vuelve a copiar y ordenar las variables.
+
+    Parámetros
+
+    X_train, y_train: Datos de entrenamiento.
+    X_val, y_val, fraccion_val: Validación opcional. El bosque no tiene parada temprana, así que por defecto se entrena con
+    todos los datos (fraccion_val=0); si se da validación (o fraccion_val > 0) solo se usa para medir el RMSE.
+    Con los mismos argumentos que entrenar_xgb se reutiliza la misma matriz de la caché.
+    n_estimators: int, Número de árboles (se construyen en paralelo en una sola ronda).
+    max_depth: int, Profundidad máxima de cada árbol.
+    subsample: float, Fracción de filas de cada árbol.
+    colsample_bynode: float, Fracción de variables candidatas en cada nodo.
+
+    Devuelve
+
+    booster: xgb.Booster entrenado; con validación, el atributo "rmse_validacion" guarda su RMSE.
+    """
+    X_train, y_train, X_val, y_val = _particion_validacion(X_train, y_train, X_val, y_val, fraccion_val)
+
+    dtrain = matriz_cuantiles(X_train, y_train, max_bin)
+    evals = []
+    if X_val is not None:
+        evals = [(matriz_cuantiles(X_val, y_val, max_bin, referencia=dtrain), "validacion")]
+
+    parametros = {
+        "objective": "reg:squarederror",
+        "tree_method": "hist",
+        "max_bin": max_bin,
+        "eta": 1.0,
+        "num_parallel_tree": n_estimators,
+        "max_depth": max_depth,
+        "subsample": subsample,
+        "colsample_bynode": colsample_bynode,
+        "nthread": n_jobs_optimo(),
+        "seed": random_state,
+    }
+    resultados = {}
+    booster = xgb.train(parametros, dtrain, num_boost_round=1, evals=evals, evals_result=resultados,
+                        verbose_eval=False)
+    if evals:
+        booster.set_attr(rmse_validacion=str(resultados["validacion"]["rmse"][-1]))
+    return booster
+
+
+def predecir(booster, X):
+    """
+    Predice sin construir una DMatrix nueva (inplace_predict) y respetando la parada temprana si la hubo.
+
+    Parámetros
+
+    booster: xgb.Booster, Resultado de entrenar_xgb o entrenar_rf_hist.
+    X: Data frame o array 2D.
+
+    Devuelve
+
+    np.ndarray con las predicciones.
+    """
+    matriz, _ = preparar_matriz(X)
+    rango = (0, booster.best_iteration + 1) if "best_iteration" in booster.attributes() else (0, 0)
+    return booster.inplace_predict(matriz, iteration_range=rango)
+
+
+def importancias(booster, tipo="gain"):
+    """
+    Devuelve la importancia de cada variable ordenada de mayor a menor.
+    """
+    return pd.Series(booster.get_score(importance_type=tipo)).sort_values(ascending=False)
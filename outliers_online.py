@@ -0,0 +1,176 @@
+
+import numpy as np
+import pandas as pd
+
+
+class CuantilP2:
+    """
+    Estimador del cuantil p en streaming con el algoritmo P² (Jain y Chlamtac): 5 marcadores, memoria O(1).
+
+    Parámetros
+
+    p: float, Cuantil a estimar (0.25 para Q1, 0.75 para Q3).
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.n = 0
+        self.q = []
+        self.pos = np.arange(5, dtype=float)
+        self.deseada = np.array([0, 2 * p, 4 * p, 2 + 2 * p, 4])
+        self.incremento = np.array([0, p / 2, p, (1 + p) / 2, 1])
+
+    def actualizar(self, x):
+        self.n += 1
+        if self.n <= 5:
+            self.q.append(x)
+            if self.n == 5:
+                self.q = sorted(self.q)
+            return
+
+        q, pos = self.q, self.pos
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        pos[k + 1:] += 1
+        self.deseada += self.incremento
+
+        # Ajuste de los marcadores intermedios (parabólico y, si se sale del orden, lineal)
+        for i in (1, 2, 3):
+            d = self.deseada[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = q[i] + d / (pos[i + 1] - pos[i - 1]) * (
+                    (pos[i] - pos[i - 1] + d) * (q[i + 1] - q[i]) / (pos[i + 1] - pos[i])
+                    + (pos[i + 1] - pos[i] - d) * (q[i] - q[i - 1]) / (pos[i] - pos[i - 1]))
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + d * (q[i + d] - q[i]) / (pos[i + d] - pos[i])
+                q[i] = qp
+                pos[i] += d
+
+    @property
+    def valor(self):
+        if self.n == 0:
+            return np.nan
+        if self.n < 5:
+            return float(np.percentile(self.q, 100 * self.p))
+        return self.q[2]
+
+
+class _Flujo:
+    # Estado de una serie (estación, columna[, fase]): cuartiles del bloque actual y límites del bloque anterior
+
+    def __init__(self):
+        self.q1, self.q3 = CuantilP2(0.25), CuantilP2(0.75)
+        self.limites = None
+
+    def reiniciar_bloque(self):
+        self.q1, self.q3 = CuantilP2(0.25), CuantilP2(0.75)
+
+
+class DetectorOutliersOnline:
+    """
+    Versión online de contar_outliers_iqr: marca cada llegada horaria frente a un IQR móvil por estación y columna.
+
+    Cada serie guarda dos estimadores P² (Q1 y Q3), así que la memoria es O(1) por serie. Los límites
+    Q1 - k·IQR y Q3 + k·IQR se congelan al cerrar cada bloque de 'ventana' observaciones y se usan durante el bloque
+    siguiente, de modo que la referencia se va desplazando y una temporada alta no queda marcada entera.
+    Con 'periodo' se usa una referencia estacional: un IQR distinto para cada fase (p. ej. cada hora del día).
+
+    Parámetros
+
+    ventana: int, Observaciones por bloque de cada estación y columna (por defecto 30 días de datos horarios);
+    con 'periodo' cada fase cierra su bloque cada ventana // periodo observaciones.
+    k: float, Multiplicador del IQR (1.5 como en contar_outliers_iqr).
+    periodo: int, Número de fases estacionales en horas (24 = hora del día); None para una referencia global.
+    min_obs: int, Observaciones mínimas antes de empezar a marcar.
+    columna_estacion: str, Columna con el código de la estación.
+    """
+
+    def __init__(self, ventana=24 * 30, k=1.5, periodo=None, min_obs=48, columna_estacion="code"):
+        self.ventana = ventana
+        self.k = k
+        self.periodo = periodo
+        self.min_obs = min_obs
+        self.columna_estacion = columna_estacion
+        self.tam_bloque = max(5, ventana // periodo) if periodo else ventana
+        self.flujos = {}
+        self.conteo = {}
+
+    def _fase(self, indice):
+        if self.periodo is None:
+            return np.zeros(len(indice), dtype=int)
+        horas = pd.DatetimeIndex(indice).as_unit("ns").asi8 // 3_600_000_000_000
+        return horas % self.periodo
+
+    def _limites(self, flujo):
+        if flujo.limites is not None:
+            return flujo.limites
+        # Durante el primer bloque se usan los cuartiles acumulados hasta el momento
+        if flujo.q1.n < min(self.min_obs, self.tam_bloque):
+            return None
+        q1, q3 = flujo.q1.valor, flujo.q3.valor
+        return q1 - self.k * (q3 - q1), q3 + self.k * (q3 - q1)
+
+    def procesar(self, df):
+        """
+        Marca y después incorpora las nuevas observaciones (una o varias horas, una o varias estaciones).
+
+        Parámetros
+
+        df: Data frame indexado por fecha con la columna de estación y las columnas numéricas.
+
+        Devuelve
+
+        Data frame de 0/1 con las mismas filas y columnas numéricas (1 = outlier frente a la referencia previa).
+        """
+        columnas = df.select_dtypes(include=["number"]).columns
+        valores = df[columnas].to_numpy(dtype=float)
+        estaciones = df[self.columna_estacion].to_numpy()
+        fases = self._fase(df.index)
+        marcas = np.zeros(valores.shape, dtype=int)
+
+        for i in range(len(df)):
+            for j, col in enumerate(columnas):
+                x = valores[i, j]
+                if np.isnan(x):
+                    continue
+                clave = (estaciones[i], col, fases[i])
+                flujo = self.flujos.get(clave)
+                if flujo is None:
+                    flujo = self.flujos[clave] = _Flujo()
+
+                limites = self._limites(flujo)
+                if limites is not None and not limites[0] <= x <= limites[1]:
+                    marcas[i, j] = 1
+                    self.conteo[(estaciones[i], col)] = self.conteo.get((estaciones[i], col), 0) + 1
+
+                flujo.q1.actualizar(x)
+                flujo.q3.actualizar(x)
+                if flujo.q1.n >= self.tam_bloque:
+                    q1, q3 = flujo.q1.valor, flujo.q3.valor
+                    flujo.limites = (q1 - self.k * (q3 - q1), q3 + self.k * (q3 - q1))
+                    flujo.reiniciar_bloque()
+
+        return pd.DataFrame(marcas, index=df.index, columns=columnas)
+
+    def resumen(self, por_estacion=False):
+        """
+        Número de outliers detectados hasta el momento.
+
+        Parámetros
+
+        por_estacion: bool, Si es False devuelve una Serie por columna como contar_outliers_iqr;
+        si es True un Data frame estación × columna.
+        """
+        if not self.conteo:
+            return pd.Series(dtype=int)
+        conteo = pd.Series(self.conteo)
+        if por_estacion:
+            return conteo.unstack(fill_value=0)
+        return conteo.groupby(level=1).sum()
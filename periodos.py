@@ -0,0 +1,221 @@
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+
+from utilidades import centrar, longitud_fft
+
+
+def acf_lote(X, nlags, ajustada=True):
+    """
+    Autocorrelación de todas las columnas a la vez con FFT, normalizada por los pares observados en cada rezago.
+
+    Con NaN cada rezago se divide entre el número de pares (x_t, x_{t+k}) observados en lugar de n, de modo que los
+    huecos no sesgan la ACF hacia cero.
+
+    Parámetros
+
+    X: array-like (n,) o (n, series), puede contener NaN.
+    nlags: int, Rezago máximo.
+    ajustada: bool, Si es False cada rezago se divide entre el número de observaciones, como la acf por defecto de
+    statsmodels (la que usa Ljung-Box).
+
+    Devuelve
+
+    np.ndarray (nlags + 1, series).
+    """
+    Xc, validos = centrar(X)
+    nfft = longitud_fft(len(Xc))
+    auto = np.fft.irfft(np.abs(np.fft.rfft(Xc, nfft, axis=0)) ** 2, nfft, axis=0)[:nlags + 1]
+    pares = np.fft.irfft(np.abs(np.fft.rfft(validos.astype(float), nfft, axis=0)) ** 2, nfft, axis=0)[:nlags + 1]
+    if not ajustada:
+        pares = np.broadcast_to(validos.sum(axis=0), auto.shape)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = auto / np.maximum(np.round(pares), 1)
+        return cov / cov[0]
+
+
+def periodograma(X, quitar_tendencia=True):
+    """
+    Periodograma de todas las columnas en una sola FFT.
+
+    Parámetros
+
+    X: array-like (n,) o (n, series), puede contener NaN (se tratan como la media).
+    quitar_tendencia: bool, Si se elimina antes la tendencia lineal de cada columna (evita que domine la frecuencia 0).
+
+    Devuelve
+
+    frecuencias: np.ndarray (n // 2 + 1,) en ciclos por observación.
+    potencia: np.ndarray (n // 2 + 1, series).
+    """
+    Xc, validos = centrar(X)
+    n = len(Xc)
+    if quitar_tendencia:
+        # Mínimos cuadrados de todas las columnas a la vez sobre sus observaciones válidas
+        t = (np.arange(n) - (n - 1) / 2)[:, None]
+        pendiente = (t * Xc).sum(axis=0) / np.maximum((t ** 2 * validos).sum(axis=0), 1e-12)
+        Xc = np.where(validos, Xc - t * pendiente, 0.0)
+    return np.fft.rfftfreq(n), np.abs(np.fft.rfft(Xc, axis=0)) ** 2 / n
+
+
+def detectar_periodos(X, n_periodos=3, periodo_min=2, periodo_max=None, nombres=None):
+    """
+    Periodos dominantes de todas las columnas a la vez: picos del periodograma validados con la ACF.
+
+    Cada pico del periodograma da un periodo candidato 1/f (como en AutoPeriod): se busca el máximo de la ACF en un
+    ±10 % alrededor y solo se acepta si es un máximo local de la ACF (en una serie con tendencia la ACF es alta en
+    todos los rezagos cortos, pero no forma picos). Se devuelve ese rezago con su autocorrelación como fuerza del
+    periodo y la fracción de potencia del pico del periodograma.
+
+    Parámetros
+
+    X: array-like (n,) o (n, series).
+    n_periodos: int, Picos a devolver por serie.
+    periodo_min: int, Periodo mínimo en observaciones.
+    periodo_max: int, Periodo máximo (por defecto n // 2, para que haya al menos dos ciclos como pide
+    seasonal_decompose).
+    nombres: list, Nombre de cada columna (por defecto su posición).
+
+    Devuelve
+
+    df con serie, rango, periodo, potencia (fracción de la potencia total) y acf, ordenado por serie y rango.
+    """
+    X = np.asarray(X, dtype=float).reshape(len(X), -1)
+    n, m = X.shape
+    periodo_max = n // 2 if periodo_max is None else min(periodo_max, n // 2)
+    nombres = list(range(m)) if nombres is None else list(nombres)
+
+    frecuencias, potencia = periodograma(X)
+    with np.errstate(divide="ignore"):
+        periodos = 1 / frecuencias
+    rango_valido = (periodos >= periodo_min) & (periodos <= periodo_max)
+    total = potencia[rango_valido].sum(axis=0)
+
+    # Máximos locales dentro del rango de periodos admitido, los n_periodos mayores de cada columna
+    pico = np.zeros_like(potencia, dtype=bool)
+    pico[1:-1] = (potencia[1:-1] > potencia[:-2]) & (potencia[1:-1] >= potencia[2:])
+    puntuacion = np.where(pico & rango_valido[:, None], potencia, -np.inf)
+    mejores = np.argsort(-puntuacion, axis=0)[:n_periodos]
+    encontrados = np.take_along_axis(puntuacion, mejores, axis=0) > -np.inf
+
+    acf = acf_lote(X, periodo_max + 1)
+    filas = []
+    for j in range(m):
+        for r, i in enumerate(mejores[encontrados[:, j], j]):
+            desde = max(periodo_min, int(np.floor(0.9 * periodos[i])))
+            hasta = min(periodo_max, int(np.ceil(1.1 * periodos[i])))
+            p = desde + int(np.argmax(acf[desde:hasta + 1, j]))
+            if acf[p, j] >= acf[p - 1, j] and acf[p, j] >= acf[p + 1, j]:
+                filas.append((nombres[j], r + 1, p, potencia[i, j] / total[j], acf[p, j]))
+
+    tabla = pd.DataFrame(filas, columns=["serie", "rango", "periodo", "potencia", "acf"]).astype(
+        {"rango": int, "periodo": int, "potencia": float, "acf": float})
+    # Dos picos vecinos pueden redondear al mismo periodo: se queda el de mayor potencia
+    tabla = tabla.drop_duplicates(["serie", "periodo"]).reset_index(drop=True)
+    tabla["rango"] = tabla.groupby("serie").cumcount() + 1
+    return tabla
+
+
+def periodos_red(df, columna="PM2.5", niveles=("h", "D", "W", "ME"), n_periodos=3, columna_estacion="code"):
+    """
+    Periodos dominantes de todas las estaciones y niveles de remuestreo (horario, diario, semanal, mensual).
+
+    Parámetros
+
+    df: Data frame largo indexado por fecha con la columna de estación.
+    columna: str, Variable a estudiar.
+    niveles: tuple, Reglas de remuestreo de pandas ("h" deja la serie horaria).
+    n_periodos: int, Picos por estación y nivel.
+    columna_estacion: str, Columna con el código de la estación.
+
+    Devuelve
+
+    df con estacion, nivel, rango, periodo, potencia y acf.
+    """
+    ancho = df.pivot_table(index=df.index, columns=columna_estacion, values=columna).asfreq("h")
+    tablas = []
+    for nivel in niveles:
+        datos = ancho if nivel == "h" else ancho.resample(nivel).mean()
+        tabla = detectar_periodos(datos.to_numpy(), n_periodos, nombres=datos.columns)
+        tablas.append(tabla.rename(columns={"serie": "estacion"}).assign(nivel=nivel))
+    return pd.concat(tablas, ignore_index=True)[["estacion", "nivel", "rango", "periodo", "potencia", "acf"]]
+
+
+def periodo_dominante(serie, periodo_min=2, periodo_max=None, n_periodos=3, acf_min=0.2, defecto=None):
+    """
+    Periodo más marcado de una serie: entre los n_periodos picos del periodograma, el de mayor autocorrelación.
+
+    Parámetros
+
+    serie: array-like 1D.
+    periodo_min, periodo_max, n_periodos: Ver detectar_periodos.
+    acf_min: float, Autocorrelación mínima para aceptar un periodo (por debajo el pico es ruido).
+    defecto: Valor devuelto si ningún periodo la alcanza.
+
+    Devuelve
+
+    int con el periodo (o defecto).
+    """
+    tabla = detectar_periodos(np.asarray(serie, dtype=float), n_periodos, periodo_min, periodo_max)
+    tabla = tabla[tabla["acf"] >= acf_min]
+    if tabla.empty:
+        return defecto
+    return int(tabla.loc[tabla["acf"].idxmax(), "periodo"])
+
+
+def descomponer(serie, periodo=None, model="additive", defecto=None, freq=None, **kwargs):
+    """
+    seasonal_decompose con el periodo detectado automáticamente cuando no se indica.
+
+    El periodo cuenta posiciones, así que la serie se lleva antes a una rejilla regular (asfreq) y los huecos
+    interiores se interpolan; con dropna cada hueco desplazaría la fase estacional.
+
+    Parámetros
+
+    serie: Serie indexada por fecha.
+    periodo: int, Periodo estacional (por defecto el de periodo_dominante).
+    model: str, "additive" o "multiplicative".
+    defecto: int, Periodo a usar si no se detecta ninguno (sin él se lanza ValueError).
+    freq: str, Frecuencia de la rejilla (por defecto la del índice o, si no la tiene, el paso más frecuente).
+    **kwargs: Argumentos adicionales de seasonal_decompose.
+
+    Devuelve
+
+    DecomposeResult de statsmodels.
+    """
+    serie = serie.sort_index()
+    serie = serie[~serie.index.duplicated()]
+    if isinstance(serie.index, pd.DatetimeIndex):
+        if freq is None:
+            freq = serie.index.freq or pd.Series(serie.index).diff().dropna().mode().iloc[0]
+        serie = serie.asfreq(freq).interpolate("time", limit_area="inside")
+    serie = serie.loc[serie.first_valid_index():serie.last_valid_index()]
+    if periodo is None:
+        periodo = periodo_dominante(serie, defecto=defecto)
+        if periodo is None:
+            raise ValueError("No se ha detectado ningún periodo estacional; indique periodo o defecto")
+    return sm.tsa.seasonal_decompose(serie, model=model, period=periodo, **kwargs)
+
+
+def rejilla_sarima(periodos, p=range(3), d=(0, 1), q=range(4), P=(0, 1), D=(0, 1), Q=(0, 1)):
+    """
+    Combinaciones (order, seasonal_order) para la búsqueda de SARIMA con los periodos detectados en lugar de uno fijo.
+
+    Parámetros
+
+    periodos: iterable de int, Periodos estacionales candidatos (p. ej. los de periodos_red de una estación y nivel);
+    vacío para buscar solo ARIMA.
+    p, d, q, P, D, Q: iterables con los valores de cada orden.
+
+    Devuelve
+
+    list de tuplas ((p, d, q), (P, D, Q, s)).
+    """
+    no_estacional = [(orden, (0, 0, 0, 0)) for orden in itertools.product(p, d, q)]
+    estacional = [(orden, (*estacional, s)) for s in dict.fromkeys(int(s) for s in periodos if s > 1)
+                  for orden in itertools.product(p, d, q)
+                  for estacional in itertools.product(P, D, Q) if any(estacional)]
+    return no_estacional + estacional
@@ -0,0 +1,150 @@
+
+import numpy as np
+import pandas as pd
+
+
+def _predictor(modelo):
+    # Booster de XGBoost (modelos_arbol), estimador de sklearn/XGBRegressor o función propia
+    if hasattr(modelo, "inplace_predict"):
+        from modelos_arbol import predecir
+        return lambda X: predecir(modelo, X)
+    if hasattr(modelo, "predict"):
+        return modelo.predict
+    return modelo
+
+
+def exogenas_calendario(ultima_fecha, pasos, freq="h"):
+    """
+    Genera las variables de calendario futuras que usan los modelos de árboles (columna 'mes').
+
+    Parámetros
+
+    ultima_fecha: Timestamp, Último instante observado.
+    pasos: int, Horizonte.
+    freq: str, Frecuencia de la serie.
+
+    Devuelve
+
+    df indexado por las fechas futuras con la columna 'mes'.
+    """
+    indice = pd.date_range(ultima_fecha, periods=pasos + 1, freq=freq)[1:]
+    return pd.DataFrame({"mes": indice.month}, index=indice)
+
+
+def pronostico_recursivo(modelo, ultimos, pasos, columnas, exogenas=None, prefijo_lag="lag"):
+    """
+    Pronóstico recursivo a h pasos para todas las estaciones con una única llamada a predict por paso.
+
+    Los rezagos se guardan en un buffer circular de NumPy: en cada paso la predicción sobrescribe la posición más
+    antigua y las columnas lag1..lagL se leen con un índice desplazado, sin copiar ni reconstruir Data frames.
+
+    Parámetros
+
+    modelo: Booster de modelos_arbol, estimador con predict (RandomForestRegressor, XGBRegressor...) o función X -> y.
+    ultimos: array-like (estaciones, L) o (L,), Últimos L valores observados de la variable objetivo (el último al final).
+    pasos: int, Horizonte de predicción.
+    columnas: list, Orden de las columnas de X_train (p. ej. ['PM10', 'O3', ..., 'lag1', 'lag2', 'mes']).
+    exogenas: array-like (estaciones, pasos, n_exog) o (pasos, n_exog), Valores futuros del resto de columnas en el
+    orden en que aparecen en 'columnas'. Puede ser un Data frame si hay una sola estación.
+    prefijo_lag: str, Prefijo de las columnas de rezagos.
+
+    Devuelve
+
+    np.ndarray (estaciones, pasos) con las predicciones (o (pasos,) si se pasó una sola estación).
+    """
+    predecir = _predictor(modelo)
+    ultimos = np.asarray(ultimos, dtype=float)
+    una_estacion = ultimos.ndim == 1
+    ultimos = np.atleast_2d(ultimos)
+    S = ultimos.shape[0]
+
+    pos_lag = {int(c[len(prefijo_lag):]): j for j, c in enumerate(columnas) if c.startswith(prefijo_lag)}
+    pos_exog = [j for j, c in enumerate(columnas) if not c.startswith(prefijo_lag)]
+    L = max(pos_lag)
+    lags = np.array(sorted(pos_lag))
+    cols_lag = np.array([pos_lag[k] for k in lags])
+
+    if pos_exog:
+        exogenas = np.asarray(exogenas, dtype=float)
+        if exogenas.ndim == 2:
+            exogenas = np.broadcast_to(exogenas, (S,) + exogenas.shape)
+
+    # Buffer circular: la posición (ptr - k) % L contiene el rezago k
+    buffer = ultimos[:, -L:].copy()
+    ptr = 0
+    X = np.empty((S, len(columnas)))
+    pred = np.empty((S, pasos))
+    # Los estimadores de sklearn ajustados con Data frame esperan los nombres de las columnas
+    con_nombres = hasattr(modelo, "feature_names_in_")
+
+    for h in range(pasos):
+        X[:, cols_lag] = buffer[:, (ptr - lags) % L]
+        if pos_exog:
+            X[:, pos_exog] = exogenas[:, h]
+        y = np.asarray(predecir(pd.DataFrame(X, columns=columnas) if con_nombres else X))
+        pred[:, h] = y
+        buffer[:, ptr] = y
+        ptr = (ptr + 1) % L
+
+    return pred[0] if una_estacion else pred
+
+
+def entrenar_directo(entrenar, X, y, pasos, estaciones=None):
+    """
+    Estrategia directa: entrena un modelo por horizonte h = 1..pasos que predice y_{t+h} con la información
+    disponible en t.
+
+    Parámetros
+
+    entrenar: función (X, y) -> modelo, p. ej. lambda X, y: modelos_arbol.entrenar_xgb(X, y).
+    X: Data frame con las variables en t (incluidos lag1, lag2...), en orden temporal dentro de cada estación.
+    y: Serie objetivo alineada con X.
+    pasos: int, Horizonte máximo.
+    estaciones: array-like con el código de estación de cada fila de X si contiene varias estaciones: el objetivo se
+    desplaza dentro de cada una, de modo que las últimas filas de una estación no reciben los valores de la siguiente.
+    Si es None X debe contener una sola estación.
+
+    Devuelve
+
+    list con un modelo por horizonte (el primero predice t + 1).
+    """
+    objetivo = pd.Series(np.asarray(y), index=X.index)
+    grupos = objetivo.groupby(np.asarray(estaciones), sort=False) if estaciones is not None else objetivo
+    modelos = []
+    for h in range(1, pasos + 1):
+        desplazado = grupos.shift(-h)
+        validos = desplazado.notna().to_numpy()
+        modelos.append(entrenar(X[validos], desplazado[validos]))
+    return modelos
+
+
+def pronostico_directo(modelos, X_actual, ultima_fecha=None, freq="h"):
+    """
+    Predice los h pasos de todas las estaciones con los modelos de entrenar_directo (una llamada por horizonte).
+
+    Con la última fila observada (instante t) el modelo h da y_{t+h}, igual que forecast(steps=...) de SARIMA. Si
+    X_actual tiene la columna de calendario 'mes' se sustituye en cada horizonte por la de t + h, como en el
+    pronóstico recursivo con exogenas_calendario.
+
+    Parámetros
+
+    modelos: list, Resultado de entrenar_directo.
+    X_actual: Data frame o array (estaciones, variables) con la última fila de variables de cada estación.
+    ultima_fecha: Timestamp, Instante t de X_actual (obligatorio si X_actual tiene la columna 'mes').
+    freq: str, Frecuencia de la serie.
+
+    Devuelve
+
+    np.ndarray (estaciones, pasos).
+    """
+    calendario = None
+    if isinstance(X_actual, pd.DataFrame) and "mes" in X_actual.columns:
+        if ultima_fecha is None:
+            raise ValueError("X_actual tiene la columna 'mes': hace falta ultima_fecha para moverla a cada horizonte")
+        calendario = exogenas_calendario(ultima_fecha, len(modelos), freq)["mes"].to_numpy()
+
+    predicciones = []
+    for h, modelo in enumerate(modelos):
+        X = X_actual if calendario is None else X_actual.assign(mes=calendario[h])
+        predicciones.append(np.asarray(_predictor(modelo)(X)))
+    return np.column_stack(predicciones)
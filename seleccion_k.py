@@ -0,0 +1,112 @@
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.mixture import GaussianMixture
+
+from silueta import silueta
+from utilidades import n_jobs_optimo
+
+# Datos compartidos con cada proceso del pool (se envían una sola vez por proceso, no por tarea)
+_X = None
+_REFERENCIAS = None
+
+
+def _inicializar_proceso(X, referencias):
+    global _X, _REFERENCIAS
+    _X, _REFERENCIAS = X, referencias
+
+
+def _inercia(X, etiquetas, centros):
+    # Suma de cuadrados a su propio centro: O(n) en lugar de la matriz completa de pairwise_distances
+    return float(np.sum((X - centros[etiquetas]) ** 2))
+
+
+def _ajustar(tarea):
+    modelo, k, b, tam_muestra, random_state = tarea
+    X = _X if b < 0 else _REFERENCIAS[b]
+
+    if modelo == "kmeans":
+        km = KMeans(n_clusters=k, random_state=random_state, n_init=10).fit(X)
+        etiquetas, inercia = km.labels_, float(km.inertia_)
+    else:
+        gmm = GaussianMixture(n_components=k, random_state=random_state).fit(X)
+        etiquetas = gmm.predict(X)
+        inercia = _inercia(X, etiquetas, gmm.means_)
+
+    valor_silueta = np.nan
+    if b < 0:
+        valor_silueta = silueta(X, etiquetas, tam_muestra, random_state=random_state)
+    return modelo, k, b, inercia, valor_silueta
+
+
+def datos_referencia(X, B=10, random_state=42):
+    """
+    Genera una sola vez los B conjuntos uniformes de referencia del estadístico gap (mismo rango que X por columna).
+
+    Devuelve
+
+    np.ndarray (B, n, variables).
+    """
+    rng = np.random.default_rng(random_state)
+    return rng.uniform(X.min(axis=0), X.max(axis=0), size=(B,) + X.shape)
+
+
+def seleccionar_k(X, k_range=range(1, 11), modelos=("kmeans", "gmm"), B=10, n_jobs=None, tam_muestra=5000,
+                  random_state=42):
+    """
+    Compara el número de clusters de K-Means y GMM con el codo (inercia), el estadístico gap y la silueta.
+
+    Todos los ajustes (modelo × k × datos reales o de referencia) se lanzan en un pool de procesos. Los B conjuntos
+    de referencia se generan una vez y se reutilizan para todos los k. La silueta es exacta en O(n log n) con una
+    sola variable y se estima sobre una muestra con varias.
+
+    Parámetros
+
+    X: array-like (n,) o (n, variables), Datos ya estandarizados (p. ej. subseq).
+    k_range: iterable, Valores de k a probar.
+    modelos: tuple, 'kmeans' y/o 'gmm'.
+    B: int, Número de conjuntos de referencia del gap.
+    n_jobs: int, Procesos del pool (por defecto los núcleos disponibles).
+    tam_muestra: int, Tamaño de la muestra para la silueta multivariante.
+    random_state: int, Semilla.
+
+    Devuelve
+
+    df con columnas modelo, k, inercia, gap, sd_gap y silueta. tabla.attrs["k_optimo"] es un dict
+    {modelo: {"gap": k, "silueta": k}} con el k que maximiza cada criterio.
+    """
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X.reshape(-1, 1)
+    referencias = datos_referencia(X, B, random_state)
+    if n_jobs is None:
+        n_jobs = n_jobs_optimo()
+
+    tareas = [(m, k, b, tam_muestra, random_state) for m in modelos for k in k_range for b in range(-1, B)]
+    with ProcessPoolExecutor(n_jobs, initializer=_inicializar_proceso, initargs=(X, referencias)) as pool:
+        resultados = pd.DataFrame(list(pool.map(_ajustar, tareas, chunksize=max(1, len(tareas) // (4 * n_jobs)))),
+                                  columns=["modelo", "k", "b", "inercia", "silueta"])
+
+    reales = resultados[resultados["b"] < 0].set_index(["modelo", "k"])
+    log_ref = np.log(resultados[resultados["b"] >= 0].set_index(["modelo", "k"])["inercia"])
+    media_ref = log_ref.groupby(level=[0, 1]).mean()
+    sd_ref = log_ref.groupby(level=[0, 1]).std(ddof=0)
+
+    tabla = pd.DataFrame({
+        "inercia": reales["inercia"],
+        "gap": media_ref - np.log(reales["inercia"]),
+        "sd_gap": sd_ref * np.sqrt(1 + 1 / B),
+        "silueta": reales["silueta"],
+    }).reset_index()
+
+    k_optimo = {}
+    for m, t in tabla.groupby("modelo"):
+        # Igual que en el notebook, el k óptimo es el que maximiza cada criterio
+        k_optimo[m] = {"gap": int(t["k"].iloc[np.argmax(t["gap"])]),
+                       "silueta": int(t["k"].iloc[np.nanargmax(t["silueta"])]) if t["silueta"].notna().any() else None}
+    tabla.attrs["k_optimo"] = k_optimo
+
+    return tabla
@@ -0,0 +1,151 @@
+
+import numpy as np
+from scipy.spatial.distance import cdist
+from scipy.stats import norm
+
+
+def _preparar(X, etiquetas, excluir_ruido):
+    X = np.asarray(X, dtype=float)
+    etiquetas = np.asarray(etiquetas)
+    if excluir_ruido:
+        validas = etiquetas != -1
+        X, etiquetas = X[validas], etiquetas[validas]
+    return X, etiquetas
+
+
+def _silueta_desde_medias(a, b, n_propio):
+    # Misma convención que sklearn: 0 en clusters de un solo punto y cuando a = b = 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        s = (b - a) / np.maximum(a, b)
+    return np.where(n_propio > 1, np.nan_to_num(s), 0.0)
+
+
+def muestras_silueta_1d(x, etiquetas):
+    """
+    Silueta exacta de cada punto para una sola variable usando ordenación y sumas acumuladas.
+
+    Para cada cluster se ordenan sus valores una vez; la suma de distancias de cualquier punto a todo el cluster sale
+    de un searchsorted y dos sumas prefijas, así que el coste es O(K n log n) y la memoria O(K n), sin matriz n × n.
+
+    Parámetros
+
+    x: array-like (n,) o (n, 1).
+    etiquetas: array-like (n,).
+
+    Devuelve
+
+    np.ndarray (n,) con el valor de la silueta de cada punto (igual que sklearn.metrics.silhouette_samples).
+    """
+    x = np.asarray(x, dtype=float).ravel()
+    x = x - x.mean()  # centrar reduce la cancelación en las sumas prefijas
+    etiquetas = np.asarray(etiquetas)
+    clusters, codigo, n_c = np.unique(etiquetas, return_inverse=True, return_counts=True)
+
+    medias = np.empty((len(x), len(clusters)))
+    for c in range(len(clusters)):
+        v = np.sort(x[codigo == c])
+        prefijo = np.r_[0.0, np.cumsum(v)]
+        m = np.searchsorted(v, x)
+        suma = x * m - prefijo[m] + (prefijo[-1] - prefijo[m]) - (n_c[c] - m) * x
+        medias[:, c] = suma / n_c[c]
+
+    filas = np.arange(len(x))
+    n_propio = n_c[codigo]
+    # La distancia media al propio cluster excluye al punto: se divide entre n_c - 1
+    a = medias[filas, codigo] * n_propio / np.maximum(n_propio - 1, 1)
+    medias[filas, codigo] = np.inf
+    b = medias.min(axis=1)
+    return _silueta_desde_medias(a, b, n_propio)
+
+
+def silueta_1d(x, etiquetas, excluir_ruido=False):
+    """
+    Silueta media exacta para una sola variable en O(n log n) (ver muestras_silueta_1d).
+
+    Parámetros
+
+    x: array-like (n,) o (n, 1).
+    etiquetas: array-like (n,).
+    excluir_ruido: bool, Si se descartan los puntos con etiqueta -1 (ruido de DBSCAN) antes de calcularla.
+
+    Devuelve
+
+    float con la silueta media (np.nan si hay menos de dos clusters).
+    """
+    x, etiquetas = _preparar(x, etiquetas, excluir_ruido)
+    if len(np.unique(etiquetas)) < 2:
+        return np.nan
+    return float(muestras_silueta_1d(x, etiquetas).mean())
+
+
+def silueta_muestreada(X, etiquetas, tam_muestra=2000, alpha=0.05, tam_bloque=None, excluir_ruido=False,
+                       random_state=42, memoria_mb=256):
+    """
+    Estima la silueta media de datos multivariantes con una muestra de puntos y da un intervalo de confianza.
+
+    La silueta de cada punto muestreado se calcula de forma exacta frente a todos los datos (por bloques de filas con
+    cdist, sin guardar la matriz n × n ni tensores n × variables), de modo que la media muestral es un estimador insesgado de la silueta media.
+
+    Parámetros
+
+    X: array-like (n, variables).
+    etiquetas: array-like (n,).
+    tam_muestra: int, Número de puntos muestreados.
+    alpha: float, Nivel de significación del intervalo.
+    tam_bloque: int, Filas de distancias calculadas a la vez (por defecto las que caben en memoria_mb).
+    excluir_ruido: bool, Si se descartan los puntos con etiqueta -1.
+    random_state: int, Semilla.
+    memoria_mb: float, Memoria aproximada de cada bloque de distancias (tam_bloque × n float64).
+
+    Devuelve
+
+    media, inferior, superior: float con la estimación y el intervalo de confianza.
+    """
+    X, etiquetas = _preparar(X, etiquetas, excluir_ruido)
+    X = X.reshape(len(X), -1)
+    n = len(X)
+    if len(np.unique(etiquetas)) < 2:
+        return np.nan, np.nan, np.nan
+
+    # Se agrupan los puntos por cluster para sumar distancias con reduceat
+    orden = np.argsort(etiquetas, kind="stable")
+    X_ord, et_ord = X[orden], etiquetas[orden]
+    clusters, inicios, n_c = np.unique(et_ord, return_index=True, return_counts=True)
+
+    rng = np.random.default_rng(random_state)
+    muestra = rng.choice(n, size=min(tam_muestra, n), replace=False)
+    codigo = np.searchsorted(clusters, etiquetas[muestra])
+
+    if tam_bloque is None:
+        tam_bloque = max(1, int(memoria_mb * 2 ** 20 // (8 * n)))
+    valores = np.empty(len(muestra))
+    for i in range(0, len(muestra), tam_bloque):
+        d = cdist(X[muestra[i:i + tam_bloque]], X_ord)
+        medias = np.add.reduceat(d, inicios, axis=1) / n_c
+
+        c = codigo[i:i + tam_bloque]
+        r = np.arange(len(c))
+        a = medias[r, c] * n_c[c] / np.maximum(n_c[c] - 1, 1)
+        medias[r, c] = np.inf
+        valores[i:i + tam_bloque] = _silueta_desde_medias(a, medias.min(axis=1), n_c[c])
+
+    media = valores.mean()
+    # Error estándar con corrección por población finita (muestreo sin reemplazo)
+    ee = valores.std(ddof=1) / np.sqrt(len(valores)) * np.sqrt(1 - len(valores) / n) if len(valores) > 1 else 0.0
+    z = norm.ppf(1 - alpha / 2)
+    return float(media), float(media - z * ee), float(media + z * ee)
+
+
+def silueta(X, etiquetas, tam_muestra=2000, excluir_ruido=False, random_state=42):
+    """
+    Silueta media eligiendo el método: exacta en O(n log n) si hay una variable, muestreada si hay varias.
+
+    Devuelve
+
+    float con la silueta media (np.nan si hay menos de dos clusters).
+    """
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1 or X.shape[1] == 1:
+        return silueta_1d(X, etiquetas, excluir_ruido)
+    return silueta_muestreada(X, etiquetas, tam_muestra, excluir_ruido=excluir_ruido,
+                              random_state=random_state)[0]
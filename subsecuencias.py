@@ -0,0 +1,181 @@
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from sklearn.cluster import KMeans
+
+
+def ventanas(serie, m, paso=1):
+    """
+    Subsecuencias de longitud m como vista con strides (sin copiar la serie).
+
+    Parámetros
+
+    serie: array-like 1D.
+    m: int, Longitud de la subsecuencia (24 = forma diaria en datos horarios, 168 = semanal).
+    paso: int, Separación entre inicios (m para ventanas sin solapamiento).
+
+    Devuelve
+
+    Vista (n_ventanas, m).
+    """
+    return sliding_window_view(np.asarray(serie, dtype=float), m)[::paso]
+
+
+def _medias_desv(serie, m):
+    # Media y desviación de todas las ventanas con sumas acumuladas (O(n))
+    c1 = np.r_[0.0, np.cumsum(serie)]
+    c2 = np.r_[0.0, np.cumsum(serie ** 2)]
+    media = (c1[m:] - c1[:-m]) / m
+    var = (c2[m:] - c2[:-m]) / m - media ** 2
+    return media, np.sqrt(np.maximum(var, 0))
+
+
+def _productos(consulta, serie):
+    # Producto escalar de la consulta con todas las ventanas mediante FFT (O(n log n))
+    n, m = len(serie), len(consulta)
+    nfft = 1 << int(np.ceil(np.log2(n + m)))
+    prod = np.fft.irfft(np.fft.rfft(serie, nfft) * np.fft.rfft(consulta[::-1], nfft), nfft)
+    return prod[m - 1:n]
+
+
+def _distancia_z(qt, m, mu_q, sd_q, mu_t, sd_t):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = (qt - m * mu_q * mu_t) / (m * sd_q * sd_t)
+    return np.sqrt(np.maximum(2 * m * (1 - np.clip(corr, -1, 1)), 0))
+
+
+def distancia_mass(consulta, serie):
+    """
+    Perfil de distancias euclídeas z-normalizadas de una consulta a todas las ventanas de la serie (algoritmo MASS).
+
+    Parámetros
+
+    consulta: array-like 1D de longitud m (p. ej. un episodio de referencia).
+    serie: array-like 1D.
+
+    Devuelve
+
+    np.ndarray (n - m + 1,) con la distancia a cada ventana.
+    """
+    consulta = np.asarray(consulta, dtype=float)
+    serie = np.asarray(serie, dtype=float)
+    m = len(consulta)
+    mu_t, sd_t = _medias_desv(serie, m)
+    return _distancia_z(_productos(consulta, serie), m, consulta.mean(), consulta.std(), mu_t, sd_t)
+
+
+def perfil_matriz(serie, m, zona_exclusion=None):
+    """
+    Perfil de matriz (distancia z-normalizada de cada ventana a su vecina más parecida) con el esquema STOMP.
+
+    La primera fila de productos se calcula con FFT y las siguientes se actualizan en O(n) a partir de la anterior,
+    de modo que el coste es O(n²) en tiempo pero solo O(n) en memoria.
+
+    Parámetros
+
+    serie: array-like 1D sin NaN.
+    m: int, Longitud de la subsecuencia.
+    zona_exclusion: int, Ventanas alrededor de cada una que no cuentan como vecinas (por defecto m // 4).
+
+    Devuelve
+
+    perfil: np.ndarray (n - m + 1,) con la distancia al vecino más cercano.
+    indice: np.ndarray (n - m + 1,) con la posición de ese vecino.
+    """
+    serie = np.asarray(serie, dtype=float)
+    k = len(serie) - m + 1
+    zona = m // 4 if zona_exclusion is None else zona_exclusion
+    mu, sd = _medias_desv(serie, m)
+
+    qt_inicial = _productos(serie[:m], serie)
+    qt = qt_inicial.copy()
+    perfil = np.full(k, np.inf)
+    indice = np.zeros(k, dtype=int)
+
+    for i in range(k):
+        if i > 0:
+            qt[1:] = qt[:-1] - serie[i - 1] * serie[:k - 1] + serie[i + m - 1] * serie[m:m + k - 1]
+            qt[0] = qt_inicial[i]
+        d = _distancia_z(qt, m, mu[i], sd[i], mu, sd)
+        d[max(0, i - zona):i + zona + 1] = np.inf
+        j = int(np.argmin(d))
+        perfil[i], indice[i] = d[j], j
+    return perfil, indice
+
+
+def motivos(perfil, indice, n_motivos=3, m=None):
+    """
+    Pares de ventanas más parecidas (motivos) a partir del perfil de matriz, sin repetir episodios solapados.
+
+    Parámetros
+
+    perfil, indice: Resultado de perfil_matriz.
+    n_motivos: int, Número de pares a devolver.
+    m: int, Longitud de la subsecuencia; las ventanas que solapan con un motivo ya elegido se descartan.
+
+    Devuelve
+
+    df con columnas inicio, vecino y distancia.
+    """
+    m = m or 1
+    usados = np.zeros(len(perfil), dtype=bool)
+    filas = []
+    for i in np.argsort(perfil):
+        if len(filas) == n_motivos or not np.isfinite(perfil[i]):
+            break
+        if usados[i] or usados[indice[i]]:
+            continue
+        filas.append((int(i), int(indice[i]), float(perfil[i])))
+        for p in (i, indice[i]):
+            usados[max(0, p - m + 1):p + m] = True
+    return pd.DataFrame(filas, columns=["inicio", "vecino", "distancia"])
+
+
+def clusterizar_episodios(df, columna="PM2.5", m=24, paso=None, n_clusters=6, columna_estacion="code",
+                          random_state=42):
+    """
+    Agrupa por forma los episodios (días o semanas) de todas las estaciones.
+
+    Cada estación se lleva a una rejilla horaria regular, sus ventanas se toman como vista con strides y solo se copian
+    las ventanas completas, z-normalizadas. La distancia euclídea entre ventanas z-normalizadas es la misma que usan
+    MASS y el perfil de matriz, así que K-Means agrupa formas (subida nocturna, pico de calefacción, polvo sahariano...)
+    con independencia del nivel; el nivel se conserva en las columnas media y maximo.
+
+    Parámetros
+
+    df: Data frame largo indexado por fecha con la columna de estación.
+    columna: str, Variable a estudiar.
+    m: int, Longitud del episodio (24 diario, 168 semanal).
+    paso: int, Separación entre episodios (por defecto m, sin solapamiento).
+    n_clusters: int, Número de formas.
+    columna_estacion: str, Columna con el código de la estación.
+    random_state: int, Semilla.
+
+    Devuelve
+
+    episodios: df con estacion, inicio, cluster, media y maximo de cada episodio.
+    formas: np.ndarray (n_clusters, m) con la forma media z-normalizada de cada cluster.
+    """
+    paso = paso or m
+    bloques, info = [], []
+    for codigo, grupo in df.groupby(columna_estacion):
+        serie = grupo[columna].sort_index()
+        serie = serie[~serie.index.duplicated()].asfreq("h")
+        v = ventanas(serie.to_numpy(dtype=float), m, paso)
+        completas = ~np.isnan(v).any(axis=1)
+        v = v[completas]
+        media, desv = v.mean(axis=1), v.std(axis=1)
+        bloques.append((v - media[:, None]) / np.where(desv > 0, desv, 1)[:, None])
+        info.append(pd.DataFrame({
+            "estacion": codigo,
+            "inicio": serie.index[:len(completas) * paso:paso][completas],
+            "media": media,
+            "maximo": v.max(axis=1),
+        }))
+
+    Z = np.concatenate(bloques)
+    km = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10).fit(Z)
+    episodios = pd.concat(info, ignore_index=True)
+    episodios["cluster"] = km.labels_
+    return episodios, km.cluster_centers_
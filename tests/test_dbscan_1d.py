@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from sklearn.cluster import DBSCAN
+
+from dbscan_1d import barrido_eps, dbscan_1d
+
+
+def _datos(semilla, n=400):
+    # Valores redondeados (muchos empates y distancias exactamente iguales a eps) con grupos densos y puntos sueltos
+    rng = np.random.default_rng(semilla)
+    x = np.r_[rng.normal(0, 0.3, n // 2), rng.normal(3, 0.5, n // 4), rng.uniform(-5, 10, n // 4)]
+    return np.round(rng.permutation(x), 1)
+
+
+@pytest.mark.parametrize("semilla", range(5))
+@pytest.mark.parametrize("eps, min_samples", [(0.1, 3), (0.2, 5), (0.35, 8), (1.0, 4)])
+def test_dbscan_1d_igual_que_sklearn(semilla, eps, min_samples):
+    x = _datos(semilla)
+    esperado = DBSCAN(eps=eps, min_samples=min_samples).fit(x[:, None])
+    etiquetas, nucleos = dbscan_1d(x, eps, min_samples, devolver_nucleos=True)
+    np.testing.assert_array_equal(nucleos, np.sort(esperado.core_sample_indices_))
+    np.testing.assert_array_equal(etiquetas, esperado.labels_)
+
+
+def test_dbscan_1d_punto_frontera_entre_dos_clusters():
+    # 1.0 está a eps de los núcleos de ambos grupos: sklearn se lo da al cluster que expande primero
+    x = np.array([0.0, 0.1, 0.2, 0.5, 0.8, 0.9, 1.0, 1.2, 1.1, 1.05])
+    esperado = DBSCAN(eps=0.3, min_samples=3).fit(x[:, None]).labels_
+    np.testing.assert_array_equal(dbscan_1d(x, 0.3, 3), esperado)
+
+
+@pytest.mark.parametrize("semilla", range(3))
+def test_barrido_eps_igual_que_sklearn(semilla):
+    x = _datos(semilla)
+    eps_values = [0.05, 0.1, 0.15, 0.3, 0.6]
+    tabla = barrido_eps(x, eps_values, min_samples=5)
+    for eps, n_clusters, n_ruido in tabla[["eps", "n_clusters", "n_ruido"]].itertuples(index=False):
+        etiquetas = DBSCAN(eps=eps, min_samples=5).fit(x[:, None]).labels_
+        assert n_clusters == len(set(etiquetas) - {-1})
+        assert n_ruido == np.sum(etiquetas == -1)
+
+
+def test_barrido_eps_varias_variables_igual_que_sklearn():
+    rng = np.random.default_rng(0)
+    X = np.round(np.r_[rng.normal(0, 0.3, (150, 2)), rng.normal(3, 0.3, (150, 2)), rng.uniform(-3, 6, (50, 2))], 1)
+    tabla = barrido_eps(X, [0.2, 0.3, 0.5], min_samples=5)
+    for eps, n_clusters, n_ruido in tabla[["eps", "n_clusters", "n_ruido"]].itertuples(index=False):
+        etiquetas = DBSCAN(eps=eps, min_samples=5).fit(X).labels_
+        assert n_clusters == len(set(etiquetas) - {-1})
+        assert n_ruido == np.sum(etiquetas == -1)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from statsmodels.stats.diagnostic import acorr_ljungbox, het_arch
+from statsmodels.stats.stattools import jarque_bera as jarque_bera_sm
+
+from diagnostico_residuos import arch_lm, diagnosticar, jarque_bera, ljung_box, matriz_residuos
+
+
+@pytest.fixture
+def residuos():
+    # Series de distinta longitud (NaN al final en la matriz): ruido blanco, AR(1), colas pesadas y GARCH(1,1)
+    rng = np.random.default_rng(0)
+    ar = np.zeros(700)
+    for t in range(1, 700):
+        ar[t] = 0.6 * ar[t - 1] + rng.normal()
+    garch, s2 = np.zeros(900), 1.0
+    for t in range(1, 900):
+        s2 = 0.1 + 0.3 * garch[t - 1] ** 2 + 0.6 * s2
+        garch[t] = np.sqrt(s2) * rng.normal()
+    return {"ruido": rng.normal(size=1000), "ar": ar, "t": rng.standard_t(3, size=500), "garch": garch}
+
+
+def test_ljung_box_igual_que_statsmodels(residuos):
+    E, nombres = matriz_residuos(residuos)
+    Q, p = ljung_box(E, (10, 24), gl_modelo=2)
+    for j, nombre in enumerate(nombres):
+        esperado = acorr_ljungbox(residuos[nombre], lags=[10, 24], model_df=2)
+        np.testing.assert_allclose(Q[:, j], esperado["lb_stat"], rtol=1e-8)
+        np.testing.assert_allclose(p[:, j], esperado["lb_pvalue"], rtol=1e-6, atol=1e-12)
+
+
+def test_jarque_bera_igual_que_statsmodels(residuos):
+    E, nombres = matriz_residuos(residuos)
+    JB, p = jarque_bera(E)
+    for j, nombre in enumerate(nombres):
+        jb, p_jb, _, _ = jarque_bera_sm(residuos[nombre])
+        np.testing.assert_allclose(JB[j], jb, rtol=1e-10)
+        np.testing.assert_allclose(p[j], p_jb, rtol=1e-6, atol=1e-12)
+
+
+@pytest.mark.filterwarnings("ignore:acorr_lm currently returns:FutureWarning")
+@pytest.mark.parametrize("rezagos", [1, 5, 12])
+def test_arch_lm_igual_que_statsmodels(residuos, rezagos):
+    E, nombres = matriz_residuos(residuos)
+    LM, p = arch_lm(E, rezagos)
+    for j, nombre in enumerate(nombres):
+        lm, p_lm, _, _ = het_arch(residuos[nombre], nlags=rezagos)
+        np.testing.assert_allclose(LM[j], lm, rtol=1e-6)
+        np.testing.assert_allclose(p[j], p_lm, rtol=1e-5, atol=1e-12)
+
+
+def test_diagnosticar_marca_los_modelos_mal_especificados(residuos):
+    tabla = diagnosticar(residuos, exigir=("ljung_box", "arch"))
+    assert tabla.loc["ruido", "pasa"]
+    assert not tabla.loc["ar", "pasa_ljung_box"]
+    assert not tabla.loc["garch", "pasa_arch"]
+    assert not tabla.loc["t", "pasa_jarque_bera"]
@@ -0,0 +1,62 @@
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def trozos(df, tam_trozo=50000):
+    """
+    Recorre un Data frame (o el resultado de pd.read_csv(..., chunksize=...)) en trozos consecutivos.
+
+    Parámetros
+
+    df: Data frame o iterable de Data frames.
+    tam_trozo: int, Filas por trozo cuando df es un Data frame.
+
+    Devuelve
+
+    Generador de Data frames.
+    """
+    if isinstance(df, pd.DataFrame):
+        for i in range(0, len(df), tam_trozo):
+            yield df.iloc[i:i + tam_trozo]
+    else:
+        yield from df
+
+
+def centrar(X):
+    """
+    Resta la media de cada columna ignorando los NaN y pone a 0 los NaN, para que no aporten a las sumas de una FFT.
+
+    Parámetros
+
+    X: array-like (n,) o (n, series).
+
+    Devuelve
+
+    Xc: np.ndarray (n, series) centrado.
+    validos: np.ndarray booleano (n, series) con los valores observados.
+    """
+    X = np.asarray(X, dtype=float)
+    X = X.reshape(len(X), -1)
+    validos = ~np.isnan(X)
+    return np.where(validos, X - np.nanmean(X, axis=0), 0.0), validos
+
+
+def longitud_fft(n):
+    """
+    Longitud de FFT (potencia de 2 ≥ 2n - 1) con la que la correlación circular de dos series de n valores coincide
+    con la lineal en todos los rezagos.
+    """
+    return 1 << int(np.ceil(np.log2(2 * n - 1)))
+
+
+def n_jobs_optimo():
+    """
+    Devuelve el número de núcleos realmente disponibles para el proceso (respeta afinidad de CPU y contenedores).
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
@@ -0,0 +1,175 @@
+
+import queue
+import threading
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def guardar_memmap(datos, ruta):
+    """
+    Guarda un array en disco en formato .npy y lo vuelve a abrir mapeado en memoria.
+
+    Parámetros
+
+    datos: array-like (tiempo, variables) o (series, tiempo, variables).
+    ruta: str, Fichero .npy de destino.
+
+    Devuelve
+
+    np.memmap de solo lectura con los mismos datos.
+    """
+    np.save(ruta, np.ascontiguousarray(datos, dtype=np.float32))
+    return np.load(ruta, mmap_mode="r")
+
+
+class _ErrorProductor:
+    # Envuelve la excepción del hilo de prefetch para distinguirla de un lote en la cola
+    def __init__(self, error):
+        self.error = error
+
+
+class GeneradorVentanas:
+    """
+    Genera lotes (ventana, horizonte) para entrenar una LSTM sin materializar el tensor 3D de ventanas.
+
+    Las ventanas son una vista con strides sobre el array original (que puede ser un memmap), de modo que solo se
+    copian a memoria los lotes que se van pidiendo. La memoria es O(longitud de la serie), no O(serie × ventana).
+
+    Parámetros
+
+    datos: np.ndarray, np.memmap o ruta a un .npy. Forma (tiempo, variables) o (series, tiempo, variables).
+    ventana: int, Número de pasos de entrada (look-back).
+    horizonte: int, Número de pasos a predecir.
+    objetivo: int, Posición de la variable a predecir en el último eje.
+    tam_lote: int, Tamaño del lote.
+    barajar: bool, Si se baraja el orden de las ventanas en cada época (solo se barajan índices).
+    rango: tuple (inicio, fin), Posiciones temporales que pueden usar las ventanas (útil para separar train/test).
+    prefetch: int, Número de lotes preparados por adelantado en un hilo aparte (0 para desactivarlo).
+    con_serie: bool, Si es True cada lote es ((X, serie), y) con el índice de la serie de cada ventana.
+    semilla: int, Semilla del barajado.
+    media, desv: np.ndarray (series, 1, variables), Escalado que se aplica a cada lote al copiarlo (los datos de disco
+    no se modifican ni se copian enteros); None para no escalar.
+    """
+
+    def __init__(self, datos, ventana, horizonte=1, objetivo=0, tam_lote=256, barajar=True,
+                 rango=None, prefetch=2, con_serie=False, semilla=42, media=None, desv=None):
+        if isinstance(datos, str):
+            datos = np.load(datos, mmap_mode="r")
+        if datos.ndim == 2:
+            datos = datos[None]
+
+        self.datos = datos
+        self.ventana = ventana
+        self.horizonte = horizonte
+        self.objetivo = objetivo
+        self.tam_lote = tam_lote
+        self.barajar = barajar
+        self.prefetch = prefetch
+        self.con_serie = con_serie
+        self.rng = np.random.default_rng(semilla)
+        self.media = None if media is None else np.asarray(media, dtype=np.float32)
+        self.desv = None if desv is None else np.asarray(desv, dtype=np.float32)
+
+        # Vistas (series, inicios, variables, ventana) y (series, inicios, horizonte): no copian datos
+        self._entradas = sliding_window_view(datos, ventana, axis=1)
+        self._salidas = sliding_window_view(datos[:, ventana:, objetivo], horizonte, axis=1)
+
+        inicio, fin = rango if rango is not None else (0, datos.shape[1])
+        self.indices = self._indices_validos(inicio, fin)
+
+    def _indices_validos(self, inicio, fin):
+        # Una ventana empieza en t y usa las posiciones t .. t + ventana + horizonte - 1
+        largo = self.ventana + self.horizonte
+        ultimo = min(fin, self.datos.shape[1]) - largo
+        series, inicios = [], []
+        for s in range(self.datos.shape[0]):
+            t = np.arange(inicio, ultimo + 1)
+            # Se descartan las ventanas con algún NaN usando el conteo acumulado (una pasada por serie)
+            nan = np.isnan(self.datos[s]).any(axis=1)
+            acumulado = np.r_[0, np.cumsum(nan)]
+            t = t[acumulado[t + largo] - acumulado[t] == 0]
+            series.append(np.full(len(t), s, dtype=np.int32))
+            inicios.append(t.astype(np.int64))
+        return np.column_stack([np.concatenate(series), np.concatenate(inicios)])
+
+    def __len__(self):
+        return int(np.ceil(len(self.indices) / self.tam_lote))
+
+    def lote(self, indices):
+        """
+        Copia a memoria el lote correspondiente a los pares (serie, inicio) indicados.
+
+        Devuelve
+
+        X: np.ndarray float32 (lote, ventana, variables), o (X, serie) si con_serie es True.
+        y: np.ndarray float32 (lote, horizonte).
+        """
+        s, t = indices[:, 0], indices[:, 1]
+        X = np.asarray(self._entradas[s, t], dtype=np.float32).transpose(0, 2, 1)
+        y = np.asarray(self._salidas[s, t], dtype=np.float32)
+        if self.media is not None:
+            X = (X - self.media[s]) / self.desv[s]
+            y = (y - self.media[s, :, self.objetivo]) / self.desv[s, :, self.objetivo]
+        if self.con_serie:
+            return (X, s.astype(np.int32)), y
+        return X, y
+
+    def _lotes(self):
+        orden = self.rng.permutation(len(self.indices)) if self.barajar else np.arange(len(self.indices))
+        for i in range(0, len(orden), self.tam_lote):
+            yield self.lote(self.indices[orden[i:i + self.tam_lote]])
+
+    def __iter__(self):
+        if not self.prefetch:
+            yield from self._lotes()
+            return
+
+        # Un hilo va preparando los siguientes lotes mientras se entrena con el actual. Los errores del hilo se pasan por
+        # la cola y se relanzan aquí, y al salir antes de tiempo (break, excepción en el consumidor) se avisa al hilo con
+        # 'parar' para que no quede bloqueado en put
+        cola = queue.Queue(maxsize=self.prefetch)
+        parar = threading.Event()
+        fin = object()
+
+        def entregar(elemento):
+            while not parar.is_set():
+                try:
+                    cola.put(elemento, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def productor():
+            try:
+                for b in self._lotes():
+                    if not entregar(b):
+                        return
+                entregar(fin)
+            except BaseException as error:
+                entregar(_ErrorProductor(error))
+
+        hilo = threading.Thread(target=productor, daemon=True)
+        hilo.start()
+        try:
+            while (b := cola.get()) is not fin:
+                if isinstance(b, _ErrorProductor):
+                    raise b.error
+                yield b
+        finally:
+            parar.set()
+            hilo.join()
+
+    def como_tf_dataset(self):
+        """
+        Envuelve el generador en un tf.data.Dataset con prefetch automático para pasarlo directamente a model.fit.
+        """
+        import tensorflow as tf
+
+        n_var = self.datos.shape[2]
+        entrada = tf.TensorSpec((None, self.ventana, n_var), tf.float32)
+        if self.con_serie:
+            entrada = (entrada, tf.TensorSpec((None,), tf.int32))
+        firma = (entrada, tf.TensorSpec((None, self.horizonte), tf.float32))
+        return tf.data.Dataset.from_generator(self.__iter__, output_signature=firma).prefetch(tf.data.AUTOTUNE)